@@ -0,0 +1,107 @@
+import numpy as np
+
+
+class RandomProjectionLSH:
+    """
+    Approximate nearest-neighbour index using signed random projections.
+
+    Each of `n_tables` hash tables projects a vector onto `n_bits` random
+    Gaussian directions and keeps the signs as an n_bits-bit code. Vectors
+    with a small angle between them tend to share codes, so a query only
+    looks at the movies in its own buckets. Multi-probe also visits the
+    buckets reached by flipping the query's least certain bits. Candidates
+    are meant to be re-ranked exactly by the caller.
+    """
+
+    def __init__(self, n_tables: int = 16, n_bits: int = 12, seed: int = 0):
+        if not 0 < n_bits <= 64:
+            raise ValueError("n_bits must be between 1 and 64.")
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.projections = None
+        self.codes = None
+        self.order = None
+        self.sorted_codes = None
+
+    def fit(self, vectors, block_size: int = 65536) -> 'RandomProjectionLSH':
+        """
+        Hash every row of `vectors` (sparse TF-IDF rows or dense embeddings).
+        """
+        rng = np.random.default_rng(self.seed)
+        self.projections = rng.standard_normal(
+            (vectors.shape[1], self.n_tables * self.n_bits)).astype(np.float32)
+        blocks = [self._hash(vectors[start:start + block_size])[0]
+                  for start in range(0, vectors.shape[0], block_size)]
+        self.codes = np.concatenate(blocks) if blocks else np.empty((0, self.n_tables), dtype=np.uint64)
+        self._sort_tables()
+        return self
+
+    def add(self, vectors):
+        """
+        Hash extra rows onto the end of the index without re-drawing projections.
+        """
+        self.codes = np.concatenate([self.codes, self._hash(vectors)[0]])
+        self._sort_tables()
+
+    def select(self, rows):
+        """
+        Keep only `rows`, renumbered 0..len(rows)-1 in the given order.
+        """
+        self.codes = self.codes[rows]
+        self._sort_tables()
+
+    def candidates(self, query, nprobe: int = 2) -> np.ndarray:
+        """
+        Sorted rows sharing a bucket with `query` in any table.
+
+        Args:
+            query: 1 x n_features vector (sparse or dense)
+            nprobe (int): Extra buckets per table, reached by flipping the
+                nprobe bits whose projections were closest to zero
+        """
+        codes, projected = self._hash(query)
+        codes, margins = codes[0], np.abs(projected[0]).reshape(self.n_tables, self.n_bits)
+        bit_values = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64)
+
+        found = []
+        for table in range(self.n_tables):
+            probes = [codes[table]]
+            for bit in np.argsort(margins[table])[:nprobe]:
+                probes.append(codes[table] ^ bit_values[bit])
+            sorted_codes = self.sorted_codes[:, table]
+            for code in probes:
+                start = np.searchsorted(sorted_codes, code, side='left')
+                end = np.searchsorted(sorted_codes, code, side='right')
+                found.append(self.order[start:end, table])
+        return np.unique(np.concatenate(found)) if found else np.empty(0, dtype=np.int32)
+
+    def save(self, path: str):
+        """
+        Write the projections and codes to a .npz file.
+        """
+        np.savez(path, projections=self.projections, codes=self.codes,
+                 params=np.array([self.n_tables, self.n_bits, self.seed]))
+
+    @classmethod
+    def load(cls, path: str) -> 'RandomProjectionLSH':
+        """
+        Read an index written by save().
+        """
+        with np.load(path) as data:
+            n_tables, n_bits, seed = (int(x) for x in data['params'])
+            index = cls(n_tables, n_bits, seed)
+            index.projections = data['projections']
+            index.codes = data['codes']
+        index._sort_tables()
+        return index
+
+    def _hash(self, vectors):
+        projected = np.asarray(vectors @ self.projections)
+        bits = (projected > 0).reshape(-1, self.n_tables, self.n_bits).astype(np.uint64)
+        bit_values = np.uint64(1) << np.arange(self.n_bits, dtype=np.uint64)
+        return (bits * bit_values).sum(axis=2, dtype=np.uint64), projected
+
+    def _sort_tables(self):
+        self.order = np.argsort(self.codes, axis=0, kind='stable').astype(np.int32)
+        self.sorted_codes = np.take_along_axis(self.codes, self.order, axis=0)
@@ -1,10 +1,24 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import gzip
+import base64
+import hashlib
 import json
+import math
 import os
+import sys
+import threading
+from movie_recommendation_system import MovieRecommendationSystem
+from request_coalescer import RequestCoalescer
+from recommendation_cache import create_cache
+from model_artifact import compute_catalog_version
+from catalog_loader import read_catalog
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 
@@ -47,67 +61,341 @@ def create_dataset():
     }
     return pd.DataFrame(data)
 
-def get_recommendations(df, movie_title, top_n=5):
-    """Get movie recommendations."""
-    if movie_title not in df['title'].values:
-        return []
-    
-    # Create TF-IDF vectors
-    vectorizer = TfidfVectorizer(stop_words='english')
-    tfidf_matrix = vectorizer.fit_transform(df['description'])
-    
-    # Compute cosine similarity
-    cosine_sim = cosine_similarity(tfidf_matrix, tfidf_matrix)
-    
-    # Find movie index
-    movie_idx = df[df['title'] == movie_title].index[0]
+MODEL_PATH = os.environ.get('MOVIE_MODEL_PATH', 'model_artifact')
+CATALOG_PATH = os.environ.get('MOVIE_CATALOG_PATH')
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 50))
+MAX_TOP_N = int(os.environ.get('MAX_TOP_N', 50))
+# Depth of the precomputed all-titles recommendation table (0 disables it)
+PRECOMPUTE_TOP_K = int(os.environ.get('PRECOMPUTE_TOP_K', MAX_TOP_N))
+
+# Page sizes for /movies?limit=...
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+MOVIE_FIELDS = ('title', 'genre', 'year', 'rating', 'description')
+MOVIE_SORTS = ('rating', '-rating', 'year', '-year')
+# Query parameters that turn /movies into a paged response
+PAGE_PARAMETERS = ('limit', 'offset', 'cursor', 'fields', 'sort', 'q')
+
+# Modules whose code shapes /recommend answers (this file formats them)
+ENGINE_MODULES = ('movie_recommendation_system', 'ranking', 'inverted_index', 'neighbor_table',
+                  'recommendation_table', 'ann_index', 'ivf_index', 'catalog_index')
+
+# Optional micro-batching of concurrent /recommend calls
+COALESCE_REQUESTS = os.environ.get('COALESCE_REQUESTS', '0') == '1'
+COALESCE_WINDOW_MS = float(os.environ.get('COALESCE_WINDOW_MS', 2.0))
+COALESCE_MAX_BATCH = int(os.environ.get('COALESCE_MAX_BATCH', 32))
+
+# LRU cache of /recommend responses; size 0 disables it, TTL is optional.
+# The default 'sqlite' backend is one file shared by every worker on the host.
+CACHE_BACKEND = os.environ.get('RECOMMENDATION_CACHE_BACKEND', 'sqlite')
+CACHE_PATH = os.environ.get('RECOMMENDATION_CACHE_PATH', 'recommendation_cache.sqlite')
+CACHE_SIZE = int(os.environ.get('RECOMMENDATION_CACHE_SIZE', 4096))
+CACHE_TTL = float(os.environ['RECOMMENDATION_CACHE_TTL']) if os.environ.get('RECOMMENDATION_CACHE_TTL') else None
+
+def build_recommender():
+    """Load (or build) the shared recommendation engine once per process and warm it up."""
+    catalog = read_catalog(CATALOG_PATH) if CATALOG_PATH else create_dataset()
+    engine = MovieRecommendationSystem.load_or_build(MODEL_PATH, catalog, precompute_top_k=PRECOMPUTE_TOP_K)
     
-    # Get similarity scores
-    similarity_scores = list(enumerate(cosine_sim[movie_idx]))
-    similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+    # Warm-up query so the first user request doesn't pay any first-call cost
+    engine.recommend_movies(engine.df['title'].iloc[0], 1)
+    return engine
+
+def to_json_recommendations(recommendations):
+    """Convert engine recommendations into JSON-serialisable dicts."""
+    return [{
+        'rank': rec['rank'],
+        'title': rec['title'],
+        'genre': rec['genre'],
+        'year': int(rec['year']),  # Convert numpy.int64 to regular int
+        'rating': round(float(rec['rating']), 2),  # Convert numpy float to regular float
+        'similarity_score': float(rec['similarity_score'])
+    } for rec in recommendations]
+
+def parse_top_n(value):
+    """Validate a requested number of recommendations; raises ValueError with a client-facing message."""
+    # bool is an int subclass, but "top_n": true is not a count
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_TOP_N:
+        raise ValueError(f"top_n must be an integer between 1 and {MAX_TOP_N}.")
+    return value
+
+def is_number(value):
+    """True for JSON numbers (bools are not numbers here)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def parse_string_list(data, name):
+    """A string or list of strings from a request body, as a list; raises ValueError otherwise."""
+    value = data[name]
+    # A bare string is one item, not a sequence of characters
+    if isinstance(value, str):
+        return [value]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(f"'{name}' must be a string or a list of strings.")
+    return value
+
+def parse_profile_titles(data, name):
+    """Liked/disliked titles from a request body: a string, a list of strings or a {title: weight} object.
+
+    Raises ValueError unless every weight is a finite number.
+    """
+    value = data[name]
+    if isinstance(value, dict):
+        if not all(is_number(weight) and math.isfinite(weight) for weight in value.values()):
+            raise ValueError(f"'{name}' weights must be finite numbers.")
+        return {title: float(weight) for title, weight in value.items()}
+    return parse_string_list(data, name)
+
+def parse_filters(data):
+    """Pull the optional recommendation filters out of a request body; raises ValueError on bad input."""
+    filters = {}
+    if data.get('year_range'):
+        year_range = data['year_range']
+        if (not isinstance(year_range, list) or len(year_range) != 2
+                or not all(bound is None or is_number(bound) for bound in year_range)):
+            raise ValueError("'year_range' must be a list of two years, e.g. [1990, 2010].")
+        filters['year_range'] = tuple(year_range)
+    if data.get('genres'):
+        filters['genres'] = parse_string_list(data, 'genres')
+    if data.get('min_rating') is not None:
+        if not is_number(data['min_rating']):
+            raise ValueError("'min_rating' must be a number.")
+        filters['min_rating'] = float(data['min_rating'])
+    if data.get('exclude'):
+        filters['exclude'] = parse_string_list(data, 'exclude')
+    return filters
+
+def get_recommendations(movie_title, top_n=5, year=None, **filters):
+    """Get movie recommendations from the shared engine."""
+    recommendations = recommender.recommend_movies(movie_title, top_n, year=year, **filters)
+    if recommendations and 'error' in recommendations[0]:
+        return []
     
-    # Get top N similar movies (excluding the movie itself)
-    top_indices = [i[0] for i in similarity_scores[1:top_n+1]]
+    return to_json_recommendations(recommendations)
+
+def get_batch_recommendations(items):
+    """Get recommendations for several (movie_title, top_n) pairs in one engine call."""
+    # Score every title once with the largest top_n asked for, then slice per title
+    top_n_by_title = {}
+    for movie_title, top_n in items:
+        top_n_by_title[movie_title] = max(top_n, top_n_by_title.get(movie_title, 0))
     
-    recommendations = []
-    for i, idx in enumerate(top_indices):
-        movie_data = df.iloc[idx]
-        recommendations.append({
-            'rank': i + 1,
-            'title': movie_data['title'],
-            'genre': movie_data['genre'],
-            'year': int(movie_data['year']),  # Convert numpy.int64 to regular int
-            'rating': float(movie_data['rating']),  # Convert numpy.float64 to regular float
-            'similarity_score': round(similarity_scores[i+1][1], 3)
-        })
+    results = recommender.recommend_many(list(top_n_by_title), max(top_n_by_title.values(), default=0))
+    batch = {}
+    for movie_title, top_n in top_n_by_title.items():
+        recommendations = results[movie_title]
+        if recommendations and 'error' in recommendations[0]:
+            batch[movie_title] = []
+        else:
+            batch[movie_title] = to_json_recommendations(recommendations[:top_n])
+    return batch
+
+def engine_fingerprint():
+    """Hash of the engine's source files, so cached answers never outlive a code change."""
+    digest = hashlib.sha256()
+    for path in [sys.modules[name].__file__ for name in ENGINE_MODULES] + [__file__]:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def cache_key(movie_title, top_n, year, filters):
+    """Cache key for a /recommend request, tied to the catalog, the published model and the code."""
+    # model_version alone restarts from the same value in every process, so the
+    # published artifact version identifies the model across restarts and rebuilds
+    return (movie_title, top_n, year, json.dumps(filters, sort_keys=True), catalog_version,
+            recommender.artifact_version, engine_version, recommender.model_version)
+
+def live_rows():
+    """DataFrame rows of the movies that have not been removed, in catalog order."""
+    rows = np.arange(len(recommender.df))
+    if recommender.removed:
+        rows = np.setdiff1d(rows, np.fromiter(recommender.removed, dtype=int))
+    return rows
+
+def catalog_records(rows):
+    """Catalog movies at `rows` as JSON-ready dicts, built column-wise from the DataFrame."""
+    movies = recommender.df.iloc[rows]
+    return [{
+        'title': title,
+        'genre': genre,
+        'year': year,
+        'rating': rating,
+        'description': description
+    } for title, genre, year, rating, description in zip(
+        movies['title'].astype(str).tolist(), movies['genre'].astype(str).tolist(),
+        movies['year'].astype(int).tolist(), movies['rating'].astype(float).round(2).tolist(),
+        movies['description'].astype(str).tolist())]
+
+def prepare_payload(body, mimetype):
+    """Compress a response body once (gzip, plus br if brotli is installed) and fingerprint it."""
+    encodings = {'identity': body, 'gzip': gzip.compress(body, 9, mtime=0)}
+    if brotli is not None:
+        encodings['br'] = brotli.compress(body)
+    return {'digest': hashlib.sha256(body).hexdigest()[:32], 'mimetype': mimetype, 'encodings': encodings}
+
+def send_payload(payload):
+    """Serve a prepared payload with a strong ETag, answering If-None-Match with 304."""
+    # Each encoding is its own representation, so each gets its own strong ETag
+    etags = {encoding: payload['digest'] if encoding == 'identity' else f"{payload['digest']}-{encoding}"
+             for encoding in payload['encodings']}
+    encoding = next((name for name in ('br', 'gzip')
+                     if name in payload['encodings'] and name in request.accept_encodings), 'identity')
     
-    return recommendations
+    if any(request.if_none_match.contains(etag) for etag in etags.values()):
+        response = Response(status=304)
+    else:
+        response = Response(payload['encodings'][encoding], mimetype=payload['mimetype'])
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etags[encoding])
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def sort_orderings(rows):
+    """Positions in the live movie list for each /movies sort, from the recommender's sorted indexes."""
+    # Map DataFrame rows to list positions; removed rows map to -1 and are dropped
+    positions = np.full(len(recommender.df), -1, dtype=np.int32)
+    positions[rows] = np.arange(len(rows), dtype=np.int32)
+    orderings = {}
+    for field, index in (('year', recommender.year_index), ('rating', recommender.rating_index)):
+        ascending = positions[index.order]
+        ascending = ascending[ascending >= 0]
+        orderings[field] = ascending
+        orderings[f'-{field}'] = ascending[::-1]
+    return orderings
+
+def catalog_payloads():
+    """Movie list, sort orderings, /movies JSON and index page, built once per model version."""
+    with catalog_lock:
+        if catalog_cache.get('model_version') != recommender.model_version:
+            rows = live_rows()
+            movies = catalog_records(rows)
+            catalog_cache.update(
+                model_version=recommender.model_version,
+                movies=movies,
+                orderings=sort_orderings(rows),
+                search_titles=[movie['title'].lower() for movie in movies],
+                movies_json=prepare_payload(json.dumps(movies, separators=(',', ':')).encode(), 'application/json'),
+                index_html=prepare_payload(render_template('index.html', total_movies=len(movies)).encode(),
+                                           'text/html'))
+        return catalog_cache
+
+def encode_cursor(sort, query, offset, model_version):
+    """Opaque /movies cursor: the position of the next page of one sorted search in one model version."""
+    state = json.dumps([sort, query, offset, model_version], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(state).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError for a malformed cursor."""
+    try:
+        sort, query, offset, model_version = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor.")
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Invalid cursor.")
+    return sort, query, offset, model_version
+
+def movies_page(args):
+    """One page of /movies for the query parameters limit, offset/cursor, fields, sort and q."""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+        offset = int(args.get('offset', 0))
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit and offset must be integers.'}), 400
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        return jsonify({'success': False, 'error': f"limit must be between 1 and {MAX_PAGE_SIZE}."}), 400
+    if offset < 0:
+        return jsonify({'success': False, 'error': 'offset must not be negative.'}), 400
+
+    sort = args.get('sort') or None
+    if sort is not None and sort not in MOVIE_SORTS:
+        return jsonify({'success': False, 'error': f"sort must be one of {', '.join(MOVIE_SORTS)}."}), 400
+    fields = [field for field in args.get('fields', '').split(',') if field] or list(MOVIE_FIELDS)
+    unknown = [field for field in fields if field not in MOVIE_FIELDS]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown field(s): {', '.join(unknown)}."}), 400
+    query = args.get('q', '').strip().lower() or None
+
+    payloads = catalog_payloads()
+    movies, model_version = payloads['movies'], payloads['model_version']
+    if 'cursor' in args:
+        try:
+            cursor_sort, cursor_query, offset, cursor_version = decode_cursor(args['cursor'])
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        if (cursor_sort, cursor_query) != (sort, query):
+            return jsonify({'success': False, 'error': 'The cursor belongs to a different sort order or search.'}), 400
+        if cursor_version != model_version:
+            return jsonify({'success': False,
+                            'error': 'The catalog changed since this cursor was issued; start again from the first page.'}), 409
+
+    # Positions in the movie list, in the requested order
+    positions = range(len(movies)) if sort is None else payloads['orderings'][sort]
+    if query is not None:
+        # Case-insensitive title substring match
+        matches = np.fromiter((query in title for title in payloads['search_titles']),
+                              dtype=bool, count=len(movies))
+        positions = np.asarray(positions)[matches[positions]]
+    end = min(offset + limit, len(positions))
+    page = positions[offset:end]
+    return jsonify({
+        'movies': [{field: movies[i][field] for field in fields} for i in page],
+        'total': len(positions),
+        'offset': offset,
+        'limit': limit,
+        'next_cursor': encode_cursor(sort, query, end, model_version) if end < len(positions) else None
+    })
+
+def evaluate_coalesced(items):
+    """Batch function for the request coalescer: one result list per (movie_title, top_n)."""
+    batch = get_batch_recommendations(items)
+    return [batch[movie_title][:top_n] for movie_title, top_n in items]
 
 # Global variables
-df = create_dataset()
+recommender = build_recommender()
+df = recommender.df
+coalescer = RequestCoalescer(evaluate_coalesced, COALESCE_WINDOW_MS, COALESCE_MAX_BATCH) if COALESCE_REQUESTS else None
+# A shared cache outlives restarts, so keys also carry the catalog and code fingerprints
+catalog_version = compute_catalog_version(df)
+engine_version = engine_fingerprint()
+cache_options = {'max_size': CACHE_SIZE, 'ttl_seconds': CACHE_TTL}
+if CACHE_BACKEND == 'sqlite':
+    cache_options['path'] = CACHE_PATH
+cache = create_cache(CACHE_BACKEND, **cache_options) if CACHE_SIZE > 0 else None
+catalog_lock = threading.Lock()
+catalog_cache = {}
 
 @app.route('/')
 def index():
     """Main page."""
-    movies = []
-    for _, row in df.iterrows():
-        movies.append({
-            'title': row['title'],
-            'genre': row['genre'],
-            'year': int(row['year']),
-            'rating': float(row['rating']),
-            'description': row['description']
-        })
-    return render_template('index.html', movies=movies)
+    return send_payload(catalog_payloads()['index_html'])
 
 @app.route('/recommend', methods=['POST'])
 def recommend():
     """API endpoint for getting recommendations."""
-    data = request.get_json()
+    data = request.get_json(silent=True) or {}
     movie_title = data.get('movie_title', '')
-    top_n = data.get('top_n', 5)
+    year = data.get('year')
+    if not isinstance(movie_title, str):
+        return jsonify({'success': False, 'error': "'movie_title' must be a string."}), 400
+    if year is not None and (isinstance(year, bool) or not isinstance(year, int)):
+        return jsonify({'success': False, 'error': "'year' must be an integer or null."}), 400
+    try:
+        top_n = parse_top_n(data.get('top_n', 5))
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def compute():
+        if coalescer is not None and year is None and not filters:
+            return coalescer.submit((movie_title, top_n))
+        return get_recommendations(movie_title, top_n, year, **filters)
     
-    recommendations = get_recommendations(df, movie_title, top_n)
+    if cache is not None:
+        recommendations = cache.get_or_compute(cache_key(movie_title, top_n, year, filters), compute)
+    else:
+        recommendations = compute()
     
     return jsonify({
         'success': True,
@@ -115,19 +403,99 @@ def recommend():
         'input_movie': movie_title
     })
 
+@app.route('/recommend/batch', methods=['POST'])
+def recommend_batch():
+    """API endpoint for getting recommendations for several movies at once.
+    
+    Expects {"requests": [{"movie_title": ..., "top_n": ...}, ...]}; top_n defaults
+    to the top-level "top_n" (or 5). Results are keyed by movie title.
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    default_top_n = data.get('top_n', 5)
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'error': "'requests' must be a non-empty list."}), 400
+    if len(items) > MAX_BATCH_SIZE:
+        return jsonify({'success': False,
+                        'error': f"Batch too large: {len(items)} requests, limit is {MAX_BATCH_SIZE}."}), 400
+    
+    parsed = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('movie_title'), str):
+            return jsonify({'success': False, 'error': "Each request needs a 'movie_title' string."}), 400
+        try:
+            top_n = parse_top_n(item.get('top_n', default_top_n))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        parsed.append((item['movie_title'], top_n))
+    
+    return jsonify({
+        'success': True,
+        'results': get_batch_recommendations(parsed)
+    })
+
+@app.route('/recommend/profile', methods=['POST'])
+def recommend_profile():
+    """API endpoint for recommendations from several liked (and disliked) movies.
+    
+    Expects {"liked": [...] or {title: weight}, "disliked": ..., "top_n": 5} plus
+    the same optional filters as /recommend.
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('liked'):
+        return jsonify({'success': False, 'error': "'liked' must be a non-empty list or object."}), 400
+    try:
+        liked = parse_profile_titles(data, 'liked')
+        disliked = parse_profile_titles(data, 'disliked') if data.get('disliked') else None
+        top_n = parse_top_n(data.get('top_n', 5))
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    recommendations = recommender.recommend_for_profile(liked, disliked, top_n, **filters)
+    if recommendations and 'error' in recommendations[0]:
+        recommendations = []
+    
+    return jsonify({
+        'success': True,
+        'recommendations': to_json_recommendations(recommendations)
+    })
+
+@app.route('/recommend/text', methods=['POST'])
+def recommend_text():
+    """API endpoint for recommendations from a free-text query.
+    
+    Expects {"query": "heist thriller with time travel", "top_n": 5} plus the
+    same optional filters as /recommend.
+    """
+    data = request.get_json(silent=True) or {}
+    query = data.get('query')
+    if not isinstance(query, str) or not query.strip():
+        return jsonify({'success': False, 'error': "'query' must be a non-empty string."}), 400
+    try:
+        top_n = parse_top_n(data.get('top_n', 5))
+        filters = parse_filters(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    recommendations = recommender.recommend_by_text(query, top_n, **filters)
+    if recommendations and 'error' in recommendations[0]:
+        recommendations = []
+    
+    return jsonify({
+        'success': True,
+        'recommendations': to_json_recommendations(recommendations),
+        'query': query
+    })
+
 @app.route('/movies')
 def get_movies():
-    """API endpoint for getting all movies."""
-    movies = []
-    for _, row in df.iterrows():
-        movies.append({
-            'title': row['title'],
-            'genre': row['genre'],
-            'year': int(row['year']),
-            'rating': float(row['rating']),
-            'description': row['description']
-        })
-    return jsonify(movies)
+    """API endpoint for the movie list: the full catalog, or one page when paging parameters are given."""
+    # Other parameters (e.g. cache busters) keep the legacy full array
+    if any(name in request.args for name in PAGE_PARAMETERS):
+        return movies_page(request.args)
+    return send_payload(catalog_payloads()['movies_json'])
 
 @app.route('/stats')
 def get_stats():
@@ -141,5 +509,13 @@ def get_stats():
     }
     return jsonify(stats)
 
+@app.route('/metrics')
+def get_metrics():
+    """API endpoint for serving-path counters."""
+    return jsonify({
+        'coalescer': coalescer.stats() if coalescer is not None else None,
+        'cache': cache.stats() if cache is not None else None
+    })
+
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=int(os.environ.get('PORT', 5000))) 
\ No newline at end of file
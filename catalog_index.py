@@ -0,0 +1,169 @@
+import numpy as np
+import pandas as pd
+
+
+class TitleIndex:
+    """
+    Hash index from movie title to catalog row, built once per dataset.
+
+    Titles are usually unique, so each maps straight to its row; titles shared
+    by several movies (e.g. remakes) keep all their rows and can be told apart
+    by year. Lookups are constant-time regardless of catalog size.
+    """
+
+    def __init__(self, titles, years):
+        self._years = np.asarray(years)
+        self._rows = {}
+        self._duplicates = {}
+        for row, title in enumerate(titles):
+            if title in self._rows:
+                self._duplicates.setdefault(title, [self._rows[title]]).append(row)
+            else:
+                self._rows[title] = row
+
+    def __contains__(self, title) -> bool:
+        return title in self._rows
+
+    def __getitem__(self, title) -> int:
+        return self._rows[title]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def rows(self, title) -> list:
+        """
+        All catalog rows with this title, in catalog order.
+        """
+        if title in self._duplicates:
+            return list(self._duplicates[title])
+        if title in self._rows:
+            return [self._rows[title]]
+        return []
+
+    def lookup(self, title, year: int = None):
+        """
+        Row for `title`, or None if absent. With duplicate titles, `year` picks
+        the matching release; without it the first listed one is returned.
+        """
+        if year is None:
+            return self._rows.get(title)
+        for row in self.rows(title):
+            if self._years[row] == year:
+                return row
+        return None
+
+
+class GenreIndex:
+    """
+    Inverted index from genre to the sorted catalog rows tagged with it.
+
+    The comma-separated genre strings are parsed once, per distinct string
+    rather than per row, into a case-insensitive genre vocabulary with one
+    posting list each. Filters match whole genre names, not substrings, and
+    AND/OR combinations merge posting lists, so their cost follows the size of
+    the lists involved rather than the size of the catalog.
+    """
+
+    def __init__(self, genres):
+        codes, unique_strings = pd.factorize(np.asarray(genres, dtype=object))
+        self.n_rows = len(codes)
+        self._names = {}
+        token_codes = {}
+        for code, genre_string in enumerate(unique_strings):
+            for name in str(genre_string).split(','):
+                name = name.strip()
+                if name:
+                    key = name.lower()
+                    self._names.setdefault(key, name)
+                    token_codes.setdefault(key, []).append(code)
+
+        # Group rows by genre string once, then each posting list is a merge of groups
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        bounds = np.searchsorted(codes[order], np.arange(len(unique_strings) + 1))
+        self._postings = {}
+        for key, string_codes in token_codes.items():
+            groups = [order[bounds[c]:bounds[c + 1]] for c in string_codes]
+            self._postings[key] = np.sort(np.concatenate(groups))
+
+    def __contains__(self, genre) -> bool:
+        return genre.strip().lower() in self._postings
+
+    def genres(self) -> list:
+        """
+        All genre names, sorted alphabetically.
+        """
+        return sorted(self._names.values())
+
+    def counts(self) -> dict:
+        """
+        Number of movies per genre, most common first.
+        """
+        counts = {self._names[key]: len(rows) for key, rows in self._postings.items()}
+        return dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def rows(self, genres, match_all: bool = False) -> np.ndarray:
+        """
+        Sorted rows tagged with any (OR) or, if match_all, every (AND) genre given.
+        Unknown genres match nothing.
+        """
+        if isinstance(genres, str):
+            genres = [genres]
+        empty = np.empty(0, dtype=np.int32)
+        postings = [self._postings.get(genre.strip().lower(), empty) for genre in genres]
+        if not postings:
+            return empty
+
+        if match_all:
+            return intersect_rows(postings)
+        return np.unique(np.concatenate(postings))
+
+    def mask(self, genres, match_all: bool = False) -> np.ndarray:
+        """
+        Boolean row mask version of rows().
+        """
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.rows(genres, match_all)] = True
+        return mask
+
+
+class SortedIndex:
+    """
+    A numeric column kept sorted once (argsort), for range queries.
+
+    between() finds both bounds with a binary search and returns the matching
+    rows as a slice of the sort order: O(log N + k) for k results, with no
+    boolean masks over the whole column.
+    """
+
+    def __init__(self, values):
+        values = np.asarray(values)
+        self.order = np.argsort(values, kind='stable').astype(np.int32)
+        self.sorted_values = values[self.order]
+
+    def between(self, low=None, high=None) -> np.ndarray:
+        """
+        Rows with low <= value <= high (either bound may be None), in value order.
+        """
+        start = 0 if low is None else np.searchsorted(self.sorted_values, self._bound(low), side='left')
+        end = len(self.order) if high is None else np.searchsorted(self.sorted_values, self._bound(high), side='right')
+        return self.order[start:max(start, end)]
+
+    def _bound(self, value):
+        # Compare in the column's own precision, as a pandas mask does: 8.7 rounded
+        # to float32 is above 8.7 as float64, so float32 ties would otherwise be missed
+        if np.issubdtype(self.sorted_values.dtype, np.floating):
+            return self.sorted_values.dtype.type(value)
+        return value
+
+
+def intersect_rows(row_sets) -> np.ndarray:
+    """
+    Intersect sorted, duplicate-free row arrays, smallest first.
+    """
+    row_sets = sorted(row_sets, key=len)
+    result = row_sets[0]
+    for rows in row_sets[1:]:
+        if len(result) == 0:
+            break
+        result = np.intersect1d(result, rows, assume_unique=True)
+    return result
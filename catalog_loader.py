@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+REQUIRED_COLUMNS = ['title', 'description', 'genre', 'year', 'rating']
+
+
+def _check_columns(columns, path: str):
+    missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+    if missing:
+        raise ValueError(f"Catalog '{path}' is missing required column(s): {', '.join(missing)}. "
+                         f"Expected {', '.join(REQUIRED_COLUMNS)}.")
+
+
+def _compact_chunk(chunk: pd.DataFrame, offset: int, path: str) -> pd.DataFrame:
+    """
+    Validate one chunk and convert it to compact dtypes
+    (int16 year, float32 rating, categorical genre).
+    """
+    _check_columns(chunk.columns, path)
+    chunk = chunk[REQUIRED_COLUMNS]
+
+    for column in ['title', 'description', 'genre']:
+        missing = chunk[column].isna().to_numpy()
+        if missing.any():
+            raise ValueError(f"Catalog '{path}' row {offset + int(np.argmax(missing))}: "
+                             f"'{column}' is empty.")
+
+    numeric = {}
+    for column in ['year', 'rating']:
+        values = pd.to_numeric(chunk[column], errors='coerce')
+        bad = values.isna().to_numpy()
+        if bad.any():
+            row = int(np.argmax(bad))
+            raise ValueError(f"Catalog '{path}' row {offset + row}: '{column}' must be a number, "
+                             f"got {chunk[column].iloc[row]!r}.")
+        numeric[column] = values
+
+    years = numeric['year']
+    fractional = (years % 1 != 0).to_numpy()
+    if fractional.any():
+        row = int(np.argmax(fractional))
+        raise ValueError(f"Catalog '{path}' row {offset + row}: 'year' must be a whole number, "
+                         f"got {chunk['year'].iloc[row]!r}.")
+    if years.min() < np.iinfo(np.int16).min or years.max() > np.iinfo(np.int16).max:
+        raise ValueError(f"Catalog '{path}': 'year' values must fit in int16.")
+
+    return pd.DataFrame({
+        'title': chunk['title'].astype(str).to_numpy(),
+        'description': chunk['description'].astype(str).to_numpy(),
+        'genre': pd.Categorical(chunk['genre'].astype(str)),
+        'year': years.to_numpy(dtype=np.int16),
+        'rating': numeric['rating'].to_numpy(dtype=np.float32),
+    })
+
+
+def iter_catalog_chunks(path: str, chunksize: int = 100_000):
+    """
+    Stream a CSV or JSONL catalog in validated, compact chunks.
+
+    Only `chunksize` raw rows are parsed at a time, so the parser's working
+    memory stays fixed no matter how large the file is.
+
+    Yields:
+        pd.DataFrame: Chunks with the title/description/genre/year/rating schema
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        _check_columns(pd.read_csv(path, nrows=0).columns, path)
+        reader = pd.read_csv(path, usecols=REQUIRED_COLUMNS, chunksize=chunksize,
+                             dtype={'title': str, 'description': str, 'genre': str})
+    elif extension in ('.jsonl', '.ndjson'):
+        reader = pd.read_json(path, lines=True, chunksize=chunksize,
+                              dtype={'title': str, 'description': str, 'genre': str})
+    else:
+        raise ValueError(f"Unsupported catalog format '{extension}'. Use .csv or .jsonl.")
+
+    offset = 0
+    with reader:
+        for chunk in reader:
+            yield _compact_chunk(chunk, offset, path)
+            offset += len(chunk)
+
+
+def read_catalog(path: str, chunksize: int = 100_000) -> pd.DataFrame:
+    """
+    Load a whole CSV or JSONL catalog into a compact DataFrame.
+
+    Chunks are compacted before they are combined and genre categories are
+    unioned across chunks, so only one copy of each column is ever kept.
+    """
+    parts = {column: [] for column in REQUIRED_COLUMNS}
+    n_rows = 0
+    for chunk in iter_catalog_chunks(path, chunksize):
+        n_rows += len(chunk)
+        for column in REQUIRED_COLUMNS:
+            parts[column].append(chunk[column].to_numpy() if column != 'genre' else chunk[column].array)
+    # A header-only CSV still yields one empty chunk
+    if n_rows == 0:
+        raise ValueError(f"Catalog '{path}' contains no movies.")
+
+    # Combine one column at a time and drop its chunks straight away to keep
+    # the peak at roughly one extra column rather than a second catalog.
+    columns = {}
+    for column in REQUIRED_COLUMNS:
+        if column == 'genre':
+            columns[column] = union_categoricals(parts.pop(column))
+        else:
+            columns[column] = np.concatenate(parts.pop(column))
+    return pd.DataFrame(columns)
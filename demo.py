@@ -5,8 +5,11 @@ This script demonstrates the capabilities of our recommendation system.
 """
 
 from movie_recommendation_system import MovieRecommendationSystem
+import os
 import time
 
+MODEL_PATH = os.environ.get('MOVIE_MODEL_PATH', 'model_artifact')
+
 def print_separator(title=""):
     """Print a formatted separator."""
     if title:
@@ -160,10 +163,8 @@ def main():
     
     # Initialize the recommendation system
     start_time = time.time()
-    recommender = MovieRecommendationSystem()
-    recommender.create_enhanced_dataset()
-    recommender.vectorize_descriptions()
-    recommender.compute_similarity()
+    catalog = MovieRecommendationSystem().create_enhanced_dataset()
+    recommender = MovieRecommendationSystem.load_or_build(MODEL_PATH, catalog)
     
     init_time = time.time() - start_time
     print(f"✅ System initialized in {init_time:.2f} seconds!")
@@ -2,6 +2,8 @@ import sys
 import os
 from movie_recommendation_system import MovieRecommendationSystem
 
+MODEL_PATH = os.environ.get('MOVIE_MODEL_PATH', 'model_artifact')
+
 def clear_screen():
     """Clear the terminal screen."""
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -157,11 +159,7 @@ def find_by_genre(recommender):
     print("-" * 20)
     
     # Show available genres
-    all_genres = []
-    for genres in recommender.df['genre']:
-        all_genres.extend([g.strip() for g in genres.split(',')])
-    
-    unique_genres = sorted(set(all_genres))
+    unique_genres = recommender.genre_index.genres()
     print("Available genres:")
     for i, genre in enumerate(unique_genres, 1):
         print(f"{i:2d}. {genre}")
@@ -222,11 +220,9 @@ def main():
     print("🚀 Initializing Movie Recommendation System...")
     print("⏳ This may take a moment...")
     
-    # Initialize the recommendation system
-    recommender = MovieRecommendationSystem()
-    recommender.create_enhanced_dataset()
-    recommender.vectorize_descriptions()
-    recommender.compute_similarity()
+    # Initialize the recommendation system (reusing the saved model when it matches the dataset)
+    catalog = MovieRecommendationSystem().create_enhanced_dataset()
+    recommender = MovieRecommendationSystem.load_or_build(MODEL_PATH, catalog)
     
     clear_screen()
     print_banner()
@@ -0,0 +1,167 @@
+import numpy as np
+from ranking import top_k_indices
+
+
+class InvertedIndex:
+    """
+    Term -> postings index over the columns of a TF-IDF matrix.
+
+    Each term's postings are stored impact-ordered (highest weight first)
+    together with the term's maximum weight, which bounds how much the term
+    can add to any movie's score. Queries are scored term-at-a-time: only the
+    postings of the query's terms are read, so the cost depends on query length
+    and how common its terms are, not on catalog size.
+    """
+
+    def __init__(self, tfidf_matrix):
+        postings = tfidf_matrix.tocsc()
+        n_terms = postings.shape[1]
+        terms = np.repeat(np.arange(n_terms), np.diff(postings.indptr))
+        # Within each term: weight descending, ties by movie row
+        order = np.lexsort((postings.indices, -postings.data, terms))
+
+        self.n_docs = postings.shape[0]
+        self.indptr = postings.indptr
+        self.docs = postings.indices[order]
+        self.weights = postings.data[order]
+        self.max_weights = np.zeros(n_terms)
+        has_postings = np.diff(self.indptr) > 0
+        self.max_weights[has_postings] = self.weights[self.indptr[:-1][has_postings]]
+        # Row-major copy for exact rescoring of the surviving candidates
+        self.rows = tfidf_matrix.tocsr()
+
+    def score(self, query):
+        """
+        Accumulate query . document for every movie sharing a term with the query.
+
+        Args:
+            query: 1 x n_features sparse vector (e.g. vectorizer.transform([text]))
+
+        Returns:
+            (docs, scores): Sorted movie rows with a non-zero score, and their scores
+        """
+        query = query.tocsr()
+        return self._accumulate(query.indices, query.data, self.indptr[query.indices + 1])
+
+    def search(self, query, k: int, excluded=None, allowed=None, prune: bool = True):
+        """
+        Exact top-k (rows, scores) for a query vector.
+
+        With prune=True (MaxScore-style dynamic pruning), terms are visited in
+        order of their score upper bound. Once the k-th best partial score
+        (a lower bound on the true k-th score) exceeds what the unread postings
+        could still add, the rest of a posting list, and eventually whole
+        terms, are skipped. The candidates that survive are rescored exactly
+        from their TF-IDF rows, so the result matches the exhaustive search.
+        Movies sharing no term with the query score 0; they fill the result
+        (lowest row first) when fewer than k movies score above 0, as in a
+        dense top-k over the whole row.
+
+        Args:
+            query: 1 x n_features sparse vector
+            k (int): Number of results
+            excluded: Optional collection of rows never to return
+            allowed: Optional sorted array of the only rows that may be returned
+            prune (bool): Use dynamic pruning instead of scoring every posting
+        """
+        query = query.tocsr()
+        # The upper bounds assume non-negative query weights (true for TF-IDF)
+        if prune and (query.data > 0).all():
+            docs = self._pruned_candidates(query, k, excluded, allowed)
+            scores = (self.rows[docs] @ query.T).toarray().ravel()
+        else:
+            docs, scores = self.score(query)
+            docs, scores = self._eligible(docs, scores, excluded, allowed)
+
+        positions = top_k_indices(scores, k)
+        if len(positions) < k or (len(positions) and scores[positions[-1]] < 0):
+            docs, scores = self._with_zero_scores(docs, scores, k, excluded, allowed)
+            positions = top_k_indices(scores, k)
+        return docs[positions], scores[positions]
+
+    def _with_zero_scores(self, docs, scores, k, excluded, allowed):
+        """
+        Add up to k eligible rows outside `docs` with score 0, in row order.
+        """
+        pool = np.arange(self.n_docs) if allowed is None else np.asarray(allowed)
+        # At most len(docs) + len(excluded) rows of the pool are skipped below
+        pool = pool[:k + len(docs) + len(excluded or ())]
+        pool = pool[~np.isin(pool, docs)]
+        if excluded:
+            pool = pool[~np.isin(pool, list(excluded))]
+        pool = pool[:k]
+
+        # Sorted by row so top_k_indices breaks score ties towards the lower row
+        merged = np.concatenate([docs, pool])
+        order = np.argsort(merged, kind='stable')
+        return merged[order], np.concatenate([scores, np.zeros(len(pool))])[order]
+
+    def _accumulate(self, terms, term_weights, ends):
+        """
+        Sum term contributions per movie over postings indptr[term]:end.
+        """
+        starts = self.indptr[terms]
+        if len(terms) == 0 or (ends - starts).sum() == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        docs = np.concatenate([self.docs[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([weight * self.weights[start:end]
+                                        for weight, start, end in zip(term_weights, starts, ends)])
+        touched, positions = np.unique(docs, return_inverse=True)
+        return touched, np.bincount(positions, weights=contributions, minlength=len(touched))
+
+    @staticmethod
+    def _eligible(docs, scores, excluded, allowed):
+        keep = np.ones(len(docs), dtype=bool)
+        if allowed is not None:
+            keep &= np.isin(docs, allowed, assume_unique=True)
+        if excluded:
+            keep &= ~np.isin(docs, list(excluded))
+        return docs[keep], scores[keep]
+
+    def _pruned_candidates(self, query, k, excluded, allowed):
+        """
+        Rows that may still belong to the top-k, found with MaxScore bounds.
+        """
+        terms, term_weights = query.indices, query.data
+        upper_bounds = term_weights * self.max_weights[terms]
+        order = np.argsort(-upper_bounds, kind='stable')
+        terms, term_weights, upper_bounds = terms[order], term_weights[order], upper_bounds[order]
+        # remaining[i]: most that terms after i can add to any movie
+        remaining = np.concatenate([np.cumsum(upper_bounds[::-1])[::-1][1:], [0.0]])
+
+        docs = np.empty(0, dtype=np.int32)
+        partial = np.empty(0)
+        threshold = -np.inf
+        slack = 0.0  # most that skipped postings can add to a candidate's partial score
+        for i, (term, weight) in enumerate(zip(terms, term_weights)):
+            # Small tolerance so float rounding never prunes a movie tied at the threshold
+            floor = threshold - 1e-12
+            if upper_bounds[i] + remaining[i] < floor:
+                # No unseen movie can reach the top-k any more
+                slack += upper_bounds[i:].sum()
+                break
+
+            start, end = self.indptr[term], self.indptr[term + 1]
+            if threshold > -np.inf and weight > 0:
+                # Postings are weight-descending; stop where a movie first seen
+                # here could no longer reach the threshold
+                min_weight = (floor - remaining[i]) / weight
+                cut = start + np.searchsorted(-self.weights[start:end], -min_weight, side='right')
+                if cut < end:
+                    slack += weight * self.weights[cut]
+                end = cut
+
+            new_docs, new_scores = self._eligible(self.docs[start:end], weight * self.weights[start:end],
+                                                  excluded, allowed)
+            merged = np.concatenate([docs, new_docs])
+            docs, positions = np.unique(merged, return_inverse=True)
+            partial = np.bincount(positions, weights=np.concatenate([partial, new_scores]),
+                                  minlength=len(docs))
+            if len(docs) >= k > 0:
+                threshold = np.partition(partial, len(partial) - k)[len(partial) - k]
+
+        if threshold > -np.inf:
+            # A candidate can only gain `slack` from the postings that were skipped
+            docs = docs[partial + slack >= threshold - 1e-12]
+        return docs
@@ -0,0 +1,109 @@
+import numpy as np
+from sklearn.cluster import MiniBatchKMeans
+
+
+class IVFIndex:
+    """
+    Inverted-file (cluster-pruned) index for approximate nearest-neighbour search.
+
+    Mini-batch k-means splits the catalog into `n_lists` clusters and every
+    movie is filed under its nearest centroid. A query ranks the centroids and
+    only scans the movies in its `nprobe` closest lists, so the work per query
+    is about nprobe / n_lists of the catalog. New movies are filed under the
+    existing centroids without retraining. Candidates are meant to be re-ranked
+    exactly by the caller.
+    """
+
+    def __init__(self, n_lists: int = 256, seed: int = 0):
+        self.n_lists = n_lists
+        self.seed = seed
+        self.centroids = None
+        self.labels = None
+        self.order = None
+        self.indptr = None
+
+    def fit(self, vectors, batch_size: int = 4096) -> 'IVFIndex':
+        """
+        Train the centroids on `vectors` (sparse TF-IDF rows or dense embeddings)
+        and assign every row to a list.
+        """
+        n_clusters = max(1, min(self.n_lists, vectors.shape[0]))
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size,
+                                 random_state=self.seed, n_init=3)
+        kmeans.fit(vectors)
+        self.centroids = np.ascontiguousarray(kmeans.cluster_centers_, dtype=np.float32)
+        self.labels = self._assign(vectors)
+        self._build_lists()
+        return self
+
+    def add(self, vectors):
+        """
+        File extra rows under their nearest existing centroid.
+        """
+        self.labels = np.concatenate([self.labels, self._assign(vectors)])
+        self._build_lists()
+
+    def select(self, rows):
+        """
+        Keep only `rows`, renumbered 0..len(rows)-1 in the given order.
+        """
+        self.labels = self.labels[rows]
+        self._build_lists()
+
+    def candidates(self, query, nprobe: int = 8) -> np.ndarray:
+        """
+        Sorted rows in the `nprobe` lists whose centroids are closest to `query`.
+
+        Args:
+            query: 1 x n_features vector (sparse or dense)
+            nprobe (int): Number of lists to scan, at least 1
+        """
+        if nprobe < 1:
+            raise ValueError("nprobe must be at least 1 for an IVF index.")
+        distances = self._distances(query)[0]
+        nprobe = min(nprobe, len(distances))
+        probed = np.argpartition(distances, nprobe - 1)[:nprobe]
+        rows = [self.order[self.indptr[c]:self.indptr[c + 1]] for c in probed]
+        return np.sort(np.concatenate(rows))
+
+    def list_sizes(self) -> np.ndarray:
+        """
+        Number of movies filed under each centroid.
+        """
+        return np.diff(self.indptr)
+
+    def save(self, path: str):
+        """
+        Write the centroids and list assignments to a .npz file.
+        """
+        np.savez(path, centroids=self.centroids, labels=self.labels,
+                 params=np.array([self.n_lists, self.seed]))
+
+    @classmethod
+    def load(cls, path: str) -> 'IVFIndex':
+        """
+        Read an index written by save().
+        """
+        with np.load(path) as data:
+            n_lists, seed = (int(x) for x in data['params'])
+            index = cls(n_lists, seed)
+            index.centroids = data['centroids']
+            index.labels = data['labels']
+        index._build_lists()
+        return index
+
+    def _distances(self, vectors) -> np.ndarray:
+        # Squared Euclidean distance up to the per-row constant |x|^2
+        products = np.asarray(vectors @ self.centroids.T)
+        return (self.centroids ** 2).sum(axis=1) - 2 * products
+
+    def _assign(self, vectors, block_size: int = 65536) -> np.ndarray:
+        labels = [np.argmin(self._distances(vectors[start:start + block_size]), axis=1)
+                  for start in range(0, vectors.shape[0], block_size)]
+        return np.concatenate(labels).astype(np.int32) if labels else np.empty(0, dtype=np.int32)
+
+    def _build_lists(self):
+        # Rows grouped by list (catalog order within a list), CSR style
+        self.order = np.argsort(self.labels, kind='stable').astype(np.int32)
+        counts = np.bincount(self.labels, minlength=len(self.centroids))
+        self.indptr = np.concatenate([[0], np.cumsum(counts)])
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+from neighbor_table import NeighborTable
+from recommendation_table import RecommendationTable
+from ann_index import RandomProjectionLSH
+from ivf_index import IVFIndex
+
+FORMAT_VERSION = 1
+ANN_INDEX_TYPES = {'lsh': RandomProjectionLSH, 'ivf': IVFIndex}
+MANIFEST_FILE = 'manifest.json'
+# Names the published version directory inside an artifact directory
+CURRENT_FILE = 'CURRENT'
+# Versions written this recently are never pruned (a sibling may be publishing them)
+PRUNE_GRACE_SECONDS = 60
+# Files an artifact kept directly in its directory before versioned publishing
+LEGACY_FILES = {MANIFEST_FILE, 'vocabulary.json', 'catalog.json', 'ann_index.npz'} | {
+    f"{name}.npy" for name in (
+        'tfidf_data', 'tfidf_indices', 'tfidf_indptr', 'idf', 'embeddings', 'svd_components',
+        'neighbor_indptr', 'neighbor_indices', 'neighbor_scores', 'cosine_sim',
+        'precomputed_ids', 'precomputed_scores', 'removed', 'year', 'rating')}
+CATALOG_COLUMNS = ['title', 'description', 'genre', 'year', 'rating']
+
+
+def compute_catalog_version(df: pd.DataFrame) -> str:
+    """
+    Fingerprint the catalog columns so an artifact can be matched to the data it was built from.
+    """
+    # Normalise dtypes first so the same catalog hashes the same whether it came
+    # from Python literals or the compact loader (int16/float32/categorical)
+    normalised = {
+        'title': df['title'].astype(str),
+        'description': df['description'].astype(str),
+        'genre': df['genre'].astype(str),
+        'year': df['year'].astype(np.int64),
+        'rating': df['rating'].astype(np.float64).round(3),
+    }
+    digest = hashlib.sha256()
+    for column in CATALOG_COLUMNS:
+        digest.update(column.encode())
+        digest.update(pd.util.hash_pandas_object(normalised[column], index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+
+def _vectorizer_params(vectorizer: TfidfVectorizer) -> dict:
+    # Keep only JSON-friendly settings; callables and dtypes fall back to defaults
+    params = {}
+    for key, value in vectorizer.get_params().items():
+        if value is None or isinstance(value, (str, int, float, bool, tuple, list)):
+            params[key] = list(value) if isinstance(value, tuple) else value
+    return params
+
+
+def save_artifact(recommender, path: str) -> str:
+    """
+    Write a fitted recommender to a versioned artifact directory.
+
+    Numeric arrays are stored as .npy files so they can be memory-mapped on
+    load. Each save is written to a private directory inside `path`, renamed
+    to a new version directory and then published by atomically replacing the
+    CURRENT pointer file, so readers never see a half-written or missing
+    artifact. The version this save replaced is kept for readers still opening
+    it; versions older than that are deleted.
+    """
+    df = recommender.df
+    os.makedirs(path, exist_ok=True)
+    tmp_path = os.path.join(path, f"tmp-{os.getpid()}")
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    def save_array(name, array):
+        np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(array))
+
+    tfidf = recommender.tfidf_matrix.tocsr()
+    save_array('tfidf_data', tfidf.data)
+    save_array('tfidf_indices', tfidf.indices)
+    save_array('tfidf_indptr', tfidf.indptr)
+    save_array('idf', recommender.vectorizer.idf_)
+    vocabulary = {term: int(i) for term, i in recommender.vectorizer.vocabulary_.items()}
+    with open(os.path.join(tmp_path, 'vocabulary.json'), 'w') as f:
+        json.dump(vocabulary, f)
+
+    embedding_dim = None
+    if recommender.embeddings is not None:
+        embedding_dim = recommender.embeddings.shape[1]
+        save_array('embeddings', recommender.embeddings)
+        save_array('svd_components', recommender.svd.components_)
+
+    similarity = None
+    neighbor_top_k = None
+    if recommender.neighbors is not None:
+        similarity = 'neighbors'
+        save_array('neighbor_indptr', recommender.neighbors.indptr)
+        save_array('neighbor_indices', recommender.neighbors.indices)
+        save_array('neighbor_scores', recommender.neighbors.scores)
+        neighbor_top_k = recommender.neighbors.top_k
+    elif recommender.cosine_sim is not None:
+        similarity = 'dense'
+        save_array('cosine_sim', recommender.cosine_sim)
+    elif recommender.similarity_mode in ('index', 'embedding'):
+        # Nothing pairwise to store: the inverted index is rebuilt from the
+        # TF-IDF arrays on first use, embeddings are saved above
+        similarity = recommender.similarity_mode
+
+    precomputed = None
+    if recommender.precomputed is not None:
+        table = recommender.precomputed
+        precomputed = {'top_k': table.top_k, 'catalog_version': table.catalog_version,
+                       'model_version': table.model_version}
+        save_array('precomputed_ids', table.ids)
+        save_array('precomputed_scores', table.scores)
+
+    ann = None
+    if recommender.ann_index is not None:
+        ann = next(kind for kind, index_type in ANN_INDEX_TYPES.items()
+                   if isinstance(recommender.ann_index, index_type))
+        recommender.ann_index.save(os.path.join(tmp_path, 'ann_index.npz'))
+
+    if recommender.removed:
+        # Tombstoned rows stay in the arrays until the model is compacted
+        save_array('removed', np.array(sorted(recommender.removed), dtype=np.int64))
+
+    save_array('year', df['year'].to_numpy())
+    save_array('rating', df['rating'].to_numpy())
+    with open(os.path.join(tmp_path, 'catalog.json'), 'w') as f:
+        json.dump({column: df[column].astype(str).tolist()
+                   for column in ['title', 'description', 'genre']}, f)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'catalog_version': compute_catalog_version(df),
+        'n_movies': len(df),
+        'n_removed': len(recommender.removed),
+        'model_version': recommender.model_version,
+        'tfidf_shape': list(tfidf.shape),
+        'vectorizer_params': _vectorizer_params(recommender.vectorizer),
+        'similarity': similarity,
+        'neighbor_top_k': neighbor_top_k,
+        'precomputed': precomputed,
+        'embedding_dim': embedding_dim,
+        'ann': ann,
+        'ann_space': recommender.ann_space if ann else None,
+        'build_params': recommender.build_params,
+    }
+    with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Version names sort by publish time; the pid keeps sibling workers apart
+    version = f"v-{time.time_ns():020d}-{os.getpid()}"
+    os.rename(tmp_path, os.path.join(path, version))
+    previous = _current_version(path)
+    pointer_path = os.path.join(path, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+    with open(pointer_path, 'w') as f:
+        f.write(version)
+    os.replace(pointer_path, os.path.join(path, CURRENT_FILE))
+    recommender.artifact_version = version
+    _prune_versions(path, replaced=previous, published=version)
+    return path
+
+
+def _current_version(path: str):
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune_versions(path: str, replaced: str, published: str):
+    # Versions older than the one this save replaced, and files of the
+    # pre-versioned layout, are no longer reachable through CURRENT. Anything
+    # else in the directory is left alone.
+    for name in os.listdir(path):
+        entry = os.path.join(path, name)
+        if name.startswith('v-') and replaced is not None and name < replaced and name != published:
+            # A sibling may have renamed its version just before ours but not
+            # published it yet, so recently written versions are kept
+            try:
+                if time.time() - os.path.getmtime(entry) > PRUNE_GRACE_SECONDS:
+                    shutil.rmtree(entry, ignore_errors=True)
+            except FileNotFoundError:
+                pass
+        elif name in LEGACY_FILES and os.path.isfile(entry):
+            os.remove(entry)
+
+
+def resolve_artifact(path: str) -> str:
+    """
+    Directory holding the currently published version of the artifact at `path`.
+
+    Artifacts saved before versioned publishing have their files directly in `path`.
+    """
+    version = _current_version(path)
+    return path if version is None else os.path.join(path, version)
+
+
+def load_artifact(recommender, path: str, catalog_version: str = None):
+    """
+    Populate `recommender` from an artifact written by save_artifact.
+
+    Arrays are opened with mmap_mode='r', so loading does no real work until
+    pages are touched. Raises ValueError if the artifact format is unknown or
+    was built from a catalog other than `catalog_version`.
+    """
+    # Resolve the published version once, so a concurrent save cannot mix versions
+    version = _current_version(path)
+    path = resolve_artifact(path)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        raise ValueError(f"No model artifact found at '{path}'.")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Model artifact at '{path}' has format version "
+                         f"{manifest.get('format_version')}, expected {FORMAT_VERSION}.")
+    if catalog_version is not None and manifest['catalog_version'] != catalog_version:
+        raise ValueError(f"Model artifact at '{path}' was built from catalog version "
+                         f"{manifest['catalog_version']}, but the current catalog is {catalog_version}.")
+
+    def load_array(name):
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')
+
+    with open(os.path.join(path, 'catalog.json')) as f:
+        catalog = json.load(f)
+    catalog['year'] = np.asarray(load_array('year'))
+    catalog['rating'] = np.asarray(load_array('rating'))
+    catalog['genre'] = pd.Categorical(catalog['genre'])
+    recommender.load_dataset(pd.DataFrame(catalog, columns=CATALOG_COLUMNS))
+    if manifest.get('n_removed'):
+        recommender.removed = set(load_array('removed').tolist())
+
+    params = manifest['vectorizer_params']
+    if isinstance(params.get('ngram_range'), list):
+        params['ngram_range'] = tuple(params['ngram_range'])
+    vectorizer = TfidfVectorizer(**params)
+    with open(os.path.join(path, 'vocabulary.json')) as f:
+        vectorizer.vocabulary_ = json.load(f)
+    vectorizer.idf_ = np.asarray(load_array('idf'))
+    recommender.vectorizer = vectorizer
+
+    recommender.tfidf_matrix = sp.csr_matrix(
+        (load_array('tfidf_data'), load_array('tfidf_indices'), load_array('tfidf_indptr')),
+        shape=tuple(manifest['tfidf_shape']), copy=False)
+
+    recommender.svd = None
+    recommender.embeddings = None
+    if manifest.get('embedding_dim'):
+        # transform() only needs the components, so the fitted SVD is rebuilt from them
+        recommender.svd = TruncatedSVD(n_components=manifest['embedding_dim'])
+        recommender.svd.components_ = np.asarray(load_array('svd_components'))
+        recommender.svd.n_features_in_ = recommender.svd.components_.shape[1]
+        recommender.embeddings = load_array('embeddings')
+
+    recommender.cosine_sim = None
+    recommender.neighbors = None
+    if manifest['similarity'] == 'neighbors':
+        recommender.neighbors = NeighborTable(load_array('neighbor_indptr'),
+                                              load_array('neighbor_indices'),
+                                              load_array('neighbor_scores'),
+                                              manifest.get('neighbor_top_k'))
+    elif manifest['similarity'] == 'dense':
+        recommender.cosine_sim = load_array('cosine_sim')
+    recommender.similarity_mode = manifest['similarity']
+    recommender.ann_index = None
+    recommender.ann_space = None
+    if manifest.get('ann'):
+        recommender.ann_index = ANN_INDEX_TYPES[manifest['ann']].load(os.path.join(path, 'ann_index.npz'))
+        recommender.ann_space = manifest['ann_space']
+
+    # Same version as the process that saved it, so workers loading one artifact agree
+    recommender.model_version = manifest.get('model_version', recommender.model_version)
+    recommender.build_params = manifest.get('build_params')
+    recommender.artifact_version = version
+
+    recommender.precomputed = None
+    precomputed = manifest.get('precomputed')
+    if precomputed:
+        if precomputed['catalog_version'] != manifest['catalog_version']:
+            print(f"⚠️ Ignoring precomputed recommendations built for catalog "
+                  f"{precomputed['catalog_version']}, not {manifest['catalog_version']}")
+        else:
+            recommender.precomputed = RecommendationTable(
+                load_array('precomputed_ids'), load_array('precomputed_scores'),
+                precomputed['catalog_version'], precomputed['model_version'])
+
+    print(f"✅ Model loaded from '{path}' ({manifest['n_movies']} movies, "
+          f"catalog {manifest['catalog_version']})")
+    return recommender
@@ -1,10 +1,27 @@
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.decomposition import TruncatedSVD
+from sklearn.preprocessing import normalize
+from ranking import top_k_indices, top_k_rows
+from neighbor_table import build_neighbor_table, extend_neighbor_table, compact_neighbor_table
+from inverted_index import InvertedIndex
+from ann_index import RandomProjectionLSH
+from ivf_index import IVFIndex
+from recommendation_table import RecommendationTable
+from out_of_core import build_similarity_memmap, build_neighbor_table_memmap
+from catalog_loader import read_catalog, REQUIRED_COLUMNS
+from catalog_index import TitleIndex, GenreIndex, SortedIndex, intersect_rows
+from model_artifact import save_artifact, load_artifact, compute_catalog_version
 import matplotlib.pyplot as plt
 import seaborn as sns
 from typing import List, Tuple, Dict
+import inspect
+import os
+import time
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -18,8 +35,27 @@ class MovieRecommendationSystem:
         self.df = None
         self.vectorizer = None
         self.tfidf_matrix = None
+        self.svd = None
+        self.embeddings = None
         self.cosine_sim = None
+        self.neighbors = None
+        self.inverted_index = None
+        self.ann_index = None
+        self.ann_space = None
+        self.precomputed = None
+        self.similarity_mode = None
         self.movie_indices = None
+        self.genre_index = None
+        self.year_index = None
+        self.rating_index = None
+        self.removed = set()
+        # Bumped whenever the catalog, vectors or similarity structures change,
+        # so cached responses can be keyed to the model that produced them
+        self.model_version = 0
+        # Settings load_or_build() built the model with, recorded in the artifact
+        self.build_params = None
+        # Published artifact version this model was saved as or loaded from
+        self.artifact_version = None
         
     def create_enhanced_dataset(self):
         """
@@ -183,13 +219,77 @@ class MovieRecommendationSystem:
         }
         
         self.df = pd.DataFrame(data)
-        self.movie_indices = pd.Series(self.df.index, index=self.df['title'])
+        self._build_indexes()
         print(f"✅ Dataset created with {len(self.df)} movies!")
         return self.df
     
-    def vectorize_descriptions(self):
+    def load_dataset(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Use an existing DataFrame (title, description, genre, year, rating) as the dataset.
+        """
+        self.df = df.reset_index(drop=True)
+        self._build_indexes()
+        print(f"✅ Dataset loaded with {len(self.df)} movies!")
+        return self.df
+    
+    def _build_indexes(self):
+        """
+        Build the lookup structures that depend only on the dataset.
+        """
+        self.movie_indices = TitleIndex(self.df['title'].to_numpy(), self.df['year'].to_numpy())
+        self.genre_index = GenreIndex(self.df['genre'])
+        self.year_index = SortedIndex(self.df['year'].to_numpy())
+        self.rating_index = SortedIndex(self.df['rating'].to_numpy())
+        # Rows tombstoned by remove_movies(), dropped from the arrays by compact()
+        self.removed = set()
+        self.model_version += 1
+    
+    def _find_movie(self, movie_title: str, year: int = None):
+        """
+        Catalog row for a title (and optional release year), or None.
+        """
+        if not self.removed:
+            return self.movie_indices.lookup(movie_title, year)
+        for row in self.movie_indices.rows(movie_title):
+            if row not in self.removed and (year is None or self.df['year'].iat[row] == year):
+                return row
+        return None
+    
+    def _live_rows(self, rows) -> np.ndarray:
+        """
+        `rows` without the tombstoned ones.
+        """
+        rows = np.asarray(rows)
+        if not self.removed:
+            return rows
+        return rows[~np.isin(rows, list(self.removed))]
+    
+    def _not_found(self, movie_title: str, year: int = None) -> str:
+        """
+        Error message for a title (and optional year) missing from the catalog.
+        """
+        if year is None:
+            return f"Movie '{movie_title}' not found in dataset."
+        return f"Movie '{movie_title}' ({year}) not found in dataset."
+    
+    def load_catalog(self, path: str, chunksize: int = 100_000) -> pd.DataFrame:
+        """
+        Load the dataset from a CSV or JSONL file, streamed in chunks.
+        
+        Columns are stored compactly (int16 year, float32 rating, categorical
+        genre) and the description column is the only copy of the text; the
+        vectorizer reads it in place.
+        """
+        return self.load_dataset(read_catalog(path, chunksize))
+    
+    def vectorize_descriptions(self, embedding_dim: int = None):
         """
         Convert movie descriptions into TF-IDF vectors.
+        
+        Args:
+            embedding_dim (int): If given, also reduce the TF-IDF matrix with a
+                truncated SVD to this many dimensions (e.g. 64-256) for use with
+                compute_similarity(mode='embedding')
         """
         self.vectorizer = TfidfVectorizer(
             stop_words='english',
@@ -197,60 +297,717 @@ class MovieRecommendationSystem:
             max_features=5000
         )
         self.tfidf_matrix = self.vectorizer.fit_transform(self.df['description'])
+        self.inverted_index = None
+        self.ann_index = None
+        self.ann_space = None
+        self.svd = None
+        self.embeddings = None
+        self.model_version += 1
         print(f"✅ TF-IDF matrix created with shape: {self.tfidf_matrix.shape}")
+        if embedding_dim:
+            self.fit_embeddings(embedding_dim)
         return self.tfidf_matrix
     
-    def compute_similarity(self):
+    def fit_embeddings(self, embedding_dim: int = 128, seed: int = 0) -> np.ndarray:
         """
-        Compute cosine similarity matrix between all movies.
+        Reduce tfidf_matrix to dense embeddings with a truncated SVD (LSA).
+        
+        Rows are L2-normalised and stored as one contiguous float32 matrix, so
+        cosine similarity is a plain matrix product that runs on multithreaded
+        BLAS, and N x d floats take far less memory than the sparse TF-IDF rows.
         """
-        self.cosine_sim = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
-        print(f"✅ Similarity matrix computed with shape: {self.cosine_sim.shape}")
-        return self.cosine_sim
+        # TruncatedSVD needs fewer components than either matrix dimension
+        embedding_dim = max(1, min(embedding_dim, min(self.tfidf_matrix.shape) - 1))
+        self.svd = TruncatedSVD(n_components=embedding_dim, random_state=seed)
+        self.embeddings = self._normalize_embeddings(self.svd.fit_transform(self.tfidf_matrix))
+        self.model_version += 1
+        print(f"✅ SVD embeddings created with shape: {self.embeddings.shape} "
+              f"({self.svd.explained_variance_ratio_.sum():.0%} of variance kept)")
+        return self.embeddings
     
-    def recommend_movies(self, movie_title: str, top_n: int = 5) -> List[Dict]:
+    @staticmethod
+    def _normalize_embeddings(vectors) -> np.ndarray:
+        return np.ascontiguousarray(normalize(vectors), dtype=np.float32)
+    
+    def _embed(self, query) -> np.ndarray:
+        """
+        Project TF-IDF query rows into the embedding space.
+        """
+        return self._normalize_embeddings(self.svd.transform(query))
+    
+    def compute_similarity(self, mode: str = 'dense', top_k: int = 50,
+                           block_size: int = 256, dtype=np.float32,
+                           out_dir: str = None, progress=None):
+        """
+        Compute cosine similarity between all movies.
+        
+        Args:
+            mode (str): 'dense' builds the full N x N matrix; 'neighbors' computes
+                similarities block by block and keeps only the top_k neighbours
+                of each movie, so memory scales as O(N * top_k); 'index' stores
+                nothing pairwise and answers each query exactly from a pruned
+                inverted index over tfidf_matrix; 'embedding' scores queries
+                against the SVD embeddings (see vectorize_descriptions) with a
+                single matrix-vector product
+            top_k (int): Neighbours kept per movie in 'neighbors' mode
+            block_size (int): Rows per block in 'neighbors' mode or when out_dir is set
+            dtype: Score dtype for the neighbour table (np.float32 or np.float16)
+            out_dir (str): If given, stream row blocks into memory-mapped .npy files
+                in this directory instead of RAM. The build reports progress per
+                block and resumes from the last finished block after a crash.
+            progress: Optional callback(done_rows, total_rows) used with out_dir
+        """
+        if mode == 'dense':
+            if out_dir is not None:
+                self.cosine_sim = build_similarity_memmap(
+                    self.tfidf_matrix, out_dir, block_size, np.float32, progress)
+            else:
+                self.cosine_sim = cosine_similarity(self.tfidf_matrix, self.tfidf_matrix)
+            self.neighbors = None
+            self.similarity_mode = mode
+            self.model_version += 1
+            print(f"✅ Similarity matrix computed with shape: {self.cosine_sim.shape}")
+            return self.cosine_sim
+        
+        if mode == 'neighbors':
+            if out_dir is not None:
+                self.neighbors = build_neighbor_table_memmap(
+                    self.tfidf_matrix, out_dir, top_k, block_size, dtype, progress)
+            else:
+                self.neighbors = build_neighbor_table(self.tfidf_matrix, top_k, block_size, dtype)
+            self.cosine_sim = None
+            self.similarity_mode = mode
+            self.model_version += 1
+            print(f"✅ Neighbor table computed for {self.neighbors.n_rows} movies "
+                  f"({self.neighbors.nbytes / 1e6:.1f} MB)")
+            return self.neighbors
+        
+        if mode == 'index':
+            self.cosine_sim = None
+            self.neighbors = None
+            self.similarity_mode = mode
+            self.model_version += 1
+            index = self._get_inverted_index()
+            print(f"✅ Inverted index built over {index.n_docs} movies")
+            return index
+        
+        if mode == 'embedding':
+            if self.embeddings is None:
+                raise ValueError("No embeddings. Call vectorize_descriptions(embedding_dim=...) first.")
+            self.cosine_sim = None
+            self.neighbors = None
+            self.similarity_mode = mode
+            self.model_version += 1
+            print(f"✅ Embedding search ready over {self.embeddings.shape[0]} movies "
+                  f"({self.embeddings.nbytes / 1e6:.1f} MB)")
+            return self.embeddings
+        
+        raise ValueError(f"Unknown similarity mode '{mode}'. "
+                         f"Use 'dense', 'neighbors', 'index' or 'embedding'.")
+    
+    def add_movies(self, movies) -> int:
+        """
+        Add new movies to a fitted model without refitting it.
+        
+        New descriptions are transformed with the existing vocabulary and IDF
+        weights and appended to tfidf_matrix (and the embeddings). Only the
+        neighbour lists that a new movie gets into are updated, the ANN index
+        files the new rows under its existing hashes or centroids, and the
+        inverted index is rebuilt on next use. Call compact() now and then to
+        refit the IDF weights.
+        
+        Args:
+            movies: DataFrame or list of dicts with title, description, genre, year and rating
+            
+        Returns:
+            int: Number of movies added
+        """
+        new = pd.DataFrame(movies)
+        missing = [column for column in REQUIRED_COLUMNS if column not in new.columns]
+        if missing:
+            raise ValueError(f"New movies are missing required column(s): {', '.join(missing)}.")
+        if new.empty:
+            return 0
+        
+        n_old = len(self.df)
+        removed = self.removed
+        df = pd.concat([self.df, new[REQUIRED_COLUMNS]], ignore_index=True)
+        # Keep the existing (possibly compact) column dtypes
+        for column in ['year', 'rating']:
+            df[column] = df[column].astype(self.df[column].dtype)
+        if isinstance(self.df['genre'].dtype, pd.CategoricalDtype):
+            df['genre'] = pd.Categorical(df['genre'].astype(str))
+        self.df = df
+        self._build_indexes()
+        self.removed = removed
+        
+        new_vectors = self.vectorizer.transform(new['description'])
+        self.tfidf_matrix = sp.vstack([self.tfidf_matrix, new_vectors], format='csr')
+        if self.embeddings is not None:
+            self.embeddings = np.vstack([self.embeddings, self._embed(new_vectors)])
+        if self.neighbors is not None:
+            self.neighbors = extend_neighbor_table(self.neighbors, self.tfidf_matrix, n_old)
+        if self.cosine_sim is not None:
+            cross = cosine_similarity(self.tfidf_matrix[n_old:], self.tfidf_matrix)
+            self.cosine_sim = np.block([[np.asarray(self.cosine_sim), cross[:, :n_old].T], [cross]])
+        if self.ann_index is not None:
+            self.ann_index.add(self._ann_vectors()[n_old:])
+        self.inverted_index = None
+        self.model_version += 1
+        
+        print(f"✅ Added {len(new)} movies ({len(self.df) - len(self.removed)} in catalog)")
+        return len(new)
+    
+    def remove_movies(self, titles: List[str]) -> int:
+        """
+        Remove movies (every release of each title) from the catalog.
+        
+        Rows are tombstoned: they stop being found or recommended straight
+        away, and compact() later drops them from the arrays.
+        
+        Returns:
+            int: Number of movies removed
+        """
+        rows = {row for title in titles for row in self.movie_indices.rows(title)} - self.removed
+        self.removed |= rows
+        self.model_version += 1
+        print(f"✅ Removed {len(rows)} movies ({len(self.df) - len(self.removed)} in catalog)")
+        return len(rows)
+    
+    def idf_drift(self) -> float:
+        """
+        Mean relative change between the fitted IDF weights and the IDF of the
+        current catalog, which add_movies()/compact() let drift apart.
+        """
+        return float(np.mean(np.abs(self._current_idf() - self.vectorizer.idf_) / self.vectorizer.idf_))
+    
+    def _current_idf(self) -> np.ndarray:
+        """
+        IDF weights recomputed from the document frequencies in tfidf_matrix,
+        with the vectorizer's smoothing.
+        """
+        n_docs, n_terms = self.tfidf_matrix.shape
+        document_frequency = np.bincount(self.tfidf_matrix.indices, minlength=n_terms)
+        smooth = int(self.vectorizer.smooth_idf)
+        return np.log((n_docs + smooth) / np.maximum(document_frequency + smooth, 1)) + 1
+    
+    def compact(self, idf_drift_threshold: float = 0.05) -> Dict:
+        """
+        Drop tombstoned movies and, if the IDF weights have drifted past the
+        threshold, refit them.
+        
+        The refit keeps the vocabulary: every TF-IDF column is rescaled by
+        new_idf / old_idf and the rows are normalised again, which equals
+        re-running the vectorizer with the new IDF. The embeddings, similarity
+        structures and ANN index are then rebuilt with their current settings.
+        
+        Returns:
+            Dict: Movies removed, IDF drift and whether IDF was refitted
+        """
+        n_removed = len(self.removed)
+        if n_removed:
+            live = np.ones(len(self.df), dtype=bool)
+            live[list(self.removed)] = False
+            rows = np.flatnonzero(live)
+            self.df = self.df.iloc[rows].reset_index(drop=True)
+            self._build_indexes()
+            self.tfidf_matrix = self.tfidf_matrix[rows]
+            if self.embeddings is not None:
+                self.embeddings = np.ascontiguousarray(self.embeddings[rows])
+            if self.neighbors is not None:
+                self.neighbors = compact_neighbor_table(self.neighbors, live)
+            if self.cosine_sim is not None:
+                self.cosine_sim = np.asarray(self.cosine_sim)[np.ix_(rows, rows)]
+            if self.ann_index is not None:
+                self.ann_index.select(rows)
+            self.inverted_index = None
+        
+        drift = self.idf_drift()
+        refit = drift > idf_drift_threshold
+        if refit:
+            self._refit_idf(self._current_idf())
+        self.model_version += 1
+        print(f"✅ Catalog compacted: {n_removed} movies dropped, IDF drift {drift:.3f}"
+              f"{' (IDF refitted)' if refit else ''}")
+        return {'removed': n_removed, 'idf_drift': drift, 'refit': refit}
+    
+    def _refit_idf(self, idf: np.ndarray):
+        """
+        Re-weight tfidf_matrix with new IDF weights and rebuild what depends on it.
+        """
+        self.tfidf_matrix = normalize(self.tfidf_matrix @ sp.diags(idf / self.vectorizer.idf_)).tocsr()
+        self.vectorizer.idf_ = idf
+        self.inverted_index = None
+        if self.embeddings is not None:
+            self.fit_embeddings(self.embeddings.shape[1])
+        if self.neighbors is not None:
+            top_k = self.neighbors.top_k
+            if top_k is None:
+                top_k = int(np.diff(self.neighbors.indptr).max(initial=0))
+            self.compute_similarity('neighbors', top_k=top_k, dtype=self.neighbors.scores.dtype)
+        elif self.cosine_sim is not None:
+            self.compute_similarity('dense')
+        if isinstance(self.ann_index, RandomProjectionLSH):
+            self.build_ann_index('lsh', self.ann_space, self.ann_index.seed,
+                                 n_tables=self.ann_index.n_tables, n_bits=self.ann_index.n_bits)
+        elif isinstance(self.ann_index, IVFIndex):
+            self.build_ann_index('ivf', self.ann_space, self.ann_index.seed,
+                                 n_lists=self.ann_index.n_lists)
+    
+    def recommend_movies(self, movie_title: str, top_n: int = 5, year: int = None,
+                         year_range: Tuple[int, int] = None, genres: List[str] = None,
+                         min_rating: float = None, exclude: List[str] = None,
+                         match_all_genres: bool = False, approximate: bool = False,
+                         nprobe: int = None) -> List[Dict]:
         """
         Recommend similar movies based on a given movie title.
         
+        Filters are applied to the candidate set before top-k selection, so the
+        result is always filled up to top_n when enough movies qualify.
+        
         Args:
             movie_title (str): Title of the movie to find recommendations for
             top_n (int): Number of recommendations to return
+            year (int): Release year, to pick one of several movies sharing a title
+            year_range (Tuple[int, int]): Only recommend movies released in this inclusive range
+            genres (List[str]): Only recommend movies with any of these genres (all if match_all_genres)
+            min_rating (float): Only recommend movies rated at least this
+            exclude (List[str]): Titles never to recommend (e.g. already watched)
+            approximate (bool): Only score the candidates found by the ANN index
+                (see build_ann_index) instead of the whole catalog
+            nprobe (int): With approximate, extra buckets per table (LSH) or
+                lists scanned (IVF); defaults to the index's own default
+            
+        Returns:
+            List[Dict]: List of recommended movies with details
+        """
+        idx = self._find_movie(movie_title, year)
+        if idx is None:
+            return [{"error": self._not_found(movie_title, year)}]
+        
+        excluded, allowed = self._resolve_constraints([idx], exclude, year_range, genres,
+                                                      min_rating, match_all_genres)
+        
+        if allowed is None and not exclude and not approximate and self._precomputed_is_current(top_n):
+            return self._format_recommendations(*self.precomputed.row(idx, top_n))
+        
+        if approximate:
+            return self._format_recommendations(*self._approximate_top(
+                self._ann_vectors()[idx:idx + 1], top_n, excluded, allowed, nprobe))
+        
+        if allowed is None and self.cosine_sim is None and self.neighbors is not None:
+            # Neighbour lists are stored best first with the movie itself left out
+            neighbor_indices, neighbor_scores = self.neighbors.row(idx)
+            keep = ~np.isin(neighbor_indices, list(excluded))
+            if keep.sum() >= top_n or len(neighbor_indices) >= len(self.df) - 1:
+                return self._format_recommendations(neighbor_indices[keep][:top_n],
+                                                    neighbor_scores[keep][:top_n])
+        
+        if self.similarity_mode == 'index':
+            # Exact top-k of the movie's own TF-IDF row via the pruned inverted index
+            top_indices, top_scores = self._get_inverted_index().search(
+                self.tfidf_matrix[idx], top_n, excluded, allowed)
+            return self._format_recommendations(top_indices, top_scores)
+        
+        # Score only the movies that pass the filters, then select the top N
+        similarity_scores = self._similarity_row(idx, allowed)
+        return self._format_recommendations(*self._select_top(similarity_scores, top_n, excluded, allowed))
+    
+    def recommend_for_profile(self, liked, disliked=None, top_n: int = 5,
+                              year_range: Tuple[int, int] = None, genres: List[str] = None,
+                              min_rating: float = None, exclude: List[str] = None,
+                              match_all_genres: bool = False) -> List[Dict]:
+        """
+        Recommend movies for a user profile made of several liked (and
+        optionally disliked) titles.
+        
+        The seed rows of tfidf_matrix are combined into one weighted query
+        vector (disliked titles count negatively), which scores the whole
+        catalog in a single sparse product. Seed movies are never recommended.
+        
+        Args:
+            liked: Title, list of titles, or dict of title -> weight
+            disliked: List of titles, or dict of title -> weight, to steer away from
+            top_n (int): Number of recommendations to return
+            year_range, genres, min_rating, exclude, match_all_genres: Same
+                filters as recommend_movies
             
         Returns:
             List[Dict]: List of recommended movies with details
         """
-        if movie_title not in self.df['title'].values:
-            return [{"error": f"Movie '{movie_title}' not found in dataset."}]
+        rows, weights = [], []
+        for titles, sign in ((liked, 1.0), (disliked, -1.0)):
+            if isinstance(titles, str):
+                titles = [titles]
+            items = titles.items() if isinstance(titles, dict) else ((title, 1.0) for title in titles or [])
+            for title, weight in items:
+                row = self._find_movie(title)
+                if row is not None:
+                    rows.append(row)
+                    weights.append(sign * float(weight))
+        if not any(weight > 0 for weight in weights):
+            return [{"error": "None of the liked movies were found in dataset."}]
+        
+        rows = np.array(rows, dtype=np.intp)
+        excluded, allowed = self._resolve_constraints(rows.tolist(), exclude, year_range, genres,
+                                                      min_rating, match_all_genres)
+        
+        if self.similarity_mode == 'embedding':
+            query = self._normalize_embeddings(np.array(weights)[None, :] @ self.embeddings[rows])[0]
+            candidates = self.embeddings if allowed is None else self.embeddings[allowed]
+            scores = candidates @ query
+            return self._format_recommendations(*self._select_top(scores, top_n, excluded, allowed))
+        
+        query = sp.csr_matrix(np.array(weights)[None, :]) @ self.tfidf_matrix[rows]
+        norm = sp.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+        
+        candidates = self.tfidf_matrix if allowed is None else self.tfidf_matrix[allowed]
+        scores = (candidates @ query.T).toarray().ravel()
+        return self._format_recommendations(*self._select_top(scores, top_n, excluded, allowed))
+    
+    def recommend_by_text(self, query: str, top_n: int = 5,
+                          year_range: Tuple[int, int] = None, genres: List[str] = None,
+                          min_rating: float = None, exclude: List[str] = None,
+                          match_all_genres: bool = False) -> List[Dict]:
+        """
+        Recommend movies matching a free-text description,
+        e.g. "heist thriller with time travel".
+        
+        The query goes through the fitted vectorizer and is scored against an
+        inverted index of tfidf_matrix, touching only the postings of the
+        query's terms. In 'embedding' mode it is projected with the fitted SVD
+        and scored against the embeddings instead.
+        
+        Args:
+            query (str): Free-text description of what to watch
+            top_n (int): Number of recommendations to return
+            year_range, genres, min_rating, exclude, match_all_genres: Same
+                filters as recommend_movies
+            
+        Returns:
+            List[Dict]: List of recommended movies with details
+        """
+        query_vector = self.vectorizer.transform([query])
+        if query_vector.nnz == 0:
+            return [{"error": f"None of the words in '{query}' appear in any movie description."}]
+        
+        excluded, allowed = self._resolve_constraints([], exclude, year_range, genres,
+                                                      min_rating, match_all_genres)
+        if self.similarity_mode == 'embedding':
+            query_embedding = self._embed(query_vector)[0]
+            candidates = self.embeddings if allowed is None else self.embeddings[allowed]
+            scores = candidates @ query_embedding
+            return self._format_recommendations(*self._select_top(scores, top_n, excluded, allowed))
+        
+        top_indices, top_scores = self._get_inverted_index().search(query_vector, top_n, excluded, allowed)
+        return self._format_recommendations(top_indices, top_scores)
+    
+    def _get_inverted_index(self) -> InvertedIndex:
+        """
+        The term -> postings index over tfidf_matrix, built on first use.
+        """
+        if self.inverted_index is None:
+            self.inverted_index = InvertedIndex(self.tfidf_matrix)
+        return self.inverted_index
+    
+    def build_ann_index(self, kind: str = 'lsh', space: str = None, seed: int = 0, **params):
+        """
+        Build an approximate nearest-neighbour index for recommend_movies(approximate=True).
+        
+        Candidates from the index are always re-ranked by their exact cosine
+        similarity. Use evaluate_ann() to tune the settings against exact search.
+        
+        Args:
+            kind (str): 'lsh' for random-projection LSH (params n_tables=16,
+                n_bits=12: more bits give smaller buckets, more tables or probes
+                give higher recall) or 'ivf' for a k-means inverted file
+                (param n_lists=256: queries scan their nprobe closest lists)
+            space (str): 'tfidf' or 'embedding' vectors to index; defaults to the
+                embeddings when they exist
+            seed (int): Seed for the random projections or k-means
+        """
+        if space is None:
+            space = 'embedding' if self.embeddings is not None else 'tfidf'
+        if space not in ('tfidf', 'embedding'):
+            raise ValueError(f"Unknown ANN space '{space}'. Use 'tfidf' or 'embedding'.")
+        if space == 'embedding' and self.embeddings is None:
+            raise ValueError("No embeddings. Call vectorize_descriptions(embedding_dim=...) first.")
+        
+        self.ann_space = space
+        vectors = self._ann_vectors()
+        if kind == 'lsh':
+            self.ann_index = RandomProjectionLSH(seed=seed, **params).fit(vectors)
+            print(f"✅ LSH index built over {space} vectors with {self.ann_index.n_tables} tables "
+                  f"x {self.ann_index.n_bits} bits")
+        elif kind == 'ivf':
+            self.ann_index = IVFIndex(seed=seed, **params).fit(vectors)
+            print(f"✅ IVF index built over {space} vectors with {len(self.ann_index.centroids)} lists")
+        else:
+            raise ValueError(f"Unknown ANN index kind '{kind}'. Use 'lsh' or 'ivf'.")
+        self.model_version += 1
+        return self.ann_index
+    
+    def _ann_vectors(self):
+        """
+        The vectors the ANN index was built over (TF-IDF rows or embeddings).
+        """
+        return self.embeddings if self.ann_space == 'embedding' else self.tfidf_matrix
+    
+    def _approximate_top(self, query, top_n: int, excluded, allowed=None, nprobe: int = None,
+                         fallback: bool = True):
+        """
+        Top-n (indices, scores) among the ANN candidates for a query vector
+        (1 x dim, in the index's space), re-ranked by exact cosine similarity.
         
-        idx = self.movie_indices[movie_title]
-        similarity_scores = list(enumerate(self.cosine_sim[idx]))
-        similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+        When the candidates cannot fill top_n (e.g. sparse buckets on a small
+        catalog) and `fallback` is set, every eligible movie is scored exactly
+        instead, so a query never comes back short just because of the index.
+        """
+        if self.ann_index is None:
+            raise ValueError("No ANN index built. Call build_ann_index() first.")
+        # Each index kind has its own default number of probes
+        candidates = self.ann_index.candidates(query, **({} if nprobe is None else {'nprobe': nprobe}))
+        if allowed is not None:
+            candidates = np.intersect1d(candidates, allowed, assume_unique=True)
+        top_indices, top_scores = self._select_top(self._exact_scores(query, candidates), top_n, excluded, candidates)
+        if len(top_indices) < top_n and fallback:
+            return self._select_top(self._exact_scores(query, allowed), top_n, excluded, allowed)
+        return top_indices, top_scores
+    
+    def _exact_scores(self, query, rows=None) -> np.ndarray:
+        """
+        Cosine similarity of a query vector to every movie, or only to `rows`,
+        in the ANN index's space.
+        """
+        vectors = self._ann_vectors()
+        candidates = vectors if rows is None else vectors[rows]
+        scores = candidates @ query.T
+        return (scores.toarray() if sp.issparse(scores) else np.asarray(scores)).ravel()
+    
+    def evaluate_ann(self, k: int = 10, n_queries: int = 100, nprobe: int = None,
+                     seed: int = 0) -> Dict:
+        """
+        Measure recall@k of the ANN index against exact search on sampled movies.
+        
+        Recall is the share of each movie's exact top-k (ignoring zero scores)
+        that the index's candidates alone return, averaged over the queries
+        (without the exact fallback of recommend_movies).
         
-        # Get top N similar movies (excluding the movie itself)
-        top_indices = [i[0] for i in similarity_scores[1:top_n+1]]
+        Returns:
+            Dict: k, recall, mean candidates scored per query, the share of
+            queries whose candidates could not fill k (and would fall back to
+            exact search) and the mean milliseconds per query of both engines
+        """
+        rng = np.random.default_rng(seed)
+        queries = rng.choice(len(self.df), size=min(n_queries, len(self.df)), replace=False)
+        probes = {} if nprobe is None else {'nprobe': nprobe}
+        vectors = self._ann_vectors()
         
+        recalls, n_candidates, n_short = [], [], 0
+        exact_seconds = approximate_seconds = 0.0
+        for idx in queries:
+            query = vectors[idx:idx + 1]
+            start = time.perf_counter()
+            scores = self._exact_scores(query)
+            exact = top_k_indices(scores, k, exclude=[idx])
+            exact = exact[scores[exact] > 0]
+            exact_seconds += time.perf_counter() - start
+            
+            start = time.perf_counter()
+            approximate, _ = self._approximate_top(query, k, {idx}, nprobe=nprobe, fallback=False)
+            approximate_seconds += time.perf_counter() - start
+            n_short += len(approximate) < min(k, len(self.df) - 1)
+            
+            n_candidates.append(len(self.ann_index.candidates(query, **probes)))
+            if len(exact):
+                recalls.append(len(np.intersect1d(exact, approximate)) / len(exact))
+        
+        report = {
+            'k': k,
+            'recall': float(np.mean(recalls)) if recalls else 1.0,
+            'mean_candidates': float(np.mean(n_candidates)),
+            'fallback_rate': n_short / len(queries),
+            'exact_ms': 1000 * exact_seconds / len(queries),
+            'approximate_ms': 1000 * approximate_seconds / len(queries),
+        }
+        print(f"✅ ANN recall@{k}: {report['recall']:.3f} "
+              f"({report['mean_candidates']:.0f} candidates/query, "
+              f"{report['fallback_rate']:.0%} would fall back to exact, "
+              f"{report['approximate_ms']:.2f} ms vs {report['exact_ms']:.2f} ms exact)")
+        return report
+    
+    def _resolve_constraints(self, seed_rows, exclude=None, year_range=None, genres=None,
+                             min_rating=None, match_all_genres=False):
+        """
+        Rows never to recommend (seeds plus excluded titles) and the sorted rows
+        allowed by the filters (None when unfiltered).
+        """
+        excluded = set(seed_rows) | self.removed
+        for title in exclude or []:
+            excluded.update(self.movie_indices.rows(title))
+        return excluded, self._filter_rows(year_range, genres, min_rating, match_all_genres)
+    
+    def _select_top(self, scores, top_n: int, excluded, allowed=None):
+        """
+        Top-n (indices, scores) from a score row, skipping excluded movies.
+        
+        When `allowed` is given, `scores` holds only those rows (in the same
+        order) and the returned indices are mapped back to catalog rows.
+        """
+        if allowed is None:
+            top_indices = top_k_indices(scores, top_n, exclude=excluded)
+            return top_indices, scores[top_indices]
+        
+        positions = top_k_indices(scores, top_n, exclude=np.flatnonzero(np.isin(allowed, list(excluded))))
+        return allowed[positions], scores[positions]
+    
+    def _similarity_row(self, idx: int, rows=None) -> np.ndarray:
+        """
+        Cosine similarity of movie idx to every movie, or only to `rows`.
+        
+        Uses the dense matrix when present, the SVD embeddings in 'embedding'
+        mode; otherwise the sparse TF-IDF rows (L2-normalised, so the dot
+        product is the cosine) are multiplied on the fly.
+        """
+        if self.cosine_sim is not None:
+            scores = np.asarray(self.cosine_sim[idx])
+            return scores if rows is None else scores[rows]
+        
+        if self.similarity_mode == 'embedding':
+            candidates = self.embeddings if rows is None else self.embeddings[rows]
+            return candidates @ self.embeddings[idx]
+        
+        candidates = self.tfidf_matrix if rows is None else self.tfidf_matrix[rows]
+        return (candidates @ self.tfidf_matrix[idx].T).toarray().ravel()
+    
+    def recommend_many(self, movie_titles: List[str], top_n: int = 5,
+                       batch_size: int = 1024) -> Dict[str, List[Dict]]:
+        """
+        Recommend similar movies for many titles at once.
+        
+        The query rows of tfidf_matrix are gathered and multiplied against the
+        whole catalog in one sparse product per batch (one dense GEMM over the
+        embeddings in 'embedding' mode), and top-k selection runs across the
+        batch in a single vectorized pass. A current precomputed table (see
+        precompute_recommendations) is sliced instead when it is deep enough.
+        
+        Args:
+            movie_titles (List[str]): Titles to find recommendations for
+            top_n (int): Number of recommendations per title
+            batch_size (int): Query rows scored per matrix product; peak memory
+                is batch_size x N similarity scores
+            
+        Returns:
+            Dict[str, List[Dict]]: Recommendations keyed by title, in input order.
+            Unknown titles map to a single error entry, like recommend_movies.
+        """
+        titles = list(dict.fromkeys(movie_titles))
+        known = [title for title in titles if self._find_movie(title) is not None]
+        rows = np.array([self._find_movie(title) for title in known], dtype=np.intp)
+        
+        found = {}
+        if self._precomputed_is_current(top_n):
+            for title, row in zip(known, rows):
+                found[title] = self._format_recommendations(*self.precomputed.row(row, top_n))
+        else:
+            for start, top_indices, top_scores in self._batch_top(rows, top_n, batch_size):
+                for title, indices, row_scores in zip(known[start:start + batch_size], top_indices, top_scores):
+                    keep = row_scores > -np.inf
+                    found[title] = self._format_recommendations(indices[keep], row_scores[keep])
+        
+        return {
+            title: found.get(title, [{"error": f"Movie '{title}' not found in dataset."}])
+            for title in titles
+        }
+    
+    def _batch_top(self, rows, top_n: int, batch_size: int = 1024):
+        """
+        Score query rows against the whole catalog batch by batch.
+        
+        Yields:
+            (start, top_indices, top_scores): Offset of the batch in `rows` and
+            its best-first top_n per row; padding entries score -inf
+        """
+        for start in range(0, len(rows), batch_size):
+            batch_rows = rows[start:start + batch_size]
+            if self.similarity_mode == 'embedding':
+                scores = self.embeddings[batch_rows] @ self.embeddings.T
+            else:
+                scores = (self.tfidf_matrix[batch_rows] @ self.tfidf_matrix.T).toarray()
+            # Exclude each query movie from its own results, and removed movies from all
+            scores[np.arange(len(batch_rows)), batch_rows] = -np.inf
+            scores[:, list(self.removed)] = -np.inf
+            
+            top_indices = top_k_rows(scores, top_n)
+            yield start, top_indices, np.take_along_axis(scores, top_indices, axis=1)
+    
+    def precompute_recommendations(self, top_k: int = 50, batch_size: int = 1024) -> RecommendationTable:
+        """
+        Precompute the top_k recommendations of every movie with the batch engine.
+        
+        Unfiltered recommend_movies() calls with top_n <= top_k are then served
+        from the table as an array slice. The table is stored as int32 ids and
+        float16 scores, saved with the model, and ignored once the catalog or
+        model changes.
+        """
+        n = len(self.df)
+        top_k = max(min(top_k, n - 1), 0)
+        ids = np.full((n, top_k), -1, dtype=np.int32)
+        scores = np.zeros((n, top_k), dtype=np.float16)
+        for start, top_indices, top_scores in self._batch_top(np.arange(n), top_k, batch_size):
+            valid = top_scores > -np.inf
+            end = start + len(top_indices)
+            ids[start:end] = np.where(valid, top_indices, -1)
+            scores[start:end] = np.where(valid, top_scores, 0)
+        
+        self.precomputed = RecommendationTable(ids, scores, compute_catalog_version(self.df), self.model_version)
+        print(f"✅ Precomputed {top_k} recommendations for {n} movies "
+              f"({self.precomputed.nbytes / 1e6:.1f} MB)")
+        return self.precomputed
+    
+    def _precomputed_is_current(self, top_n: int = 1) -> bool:
+        """
+        Whether the precomputed table was built from the current model and
+        holds top_n recommendations per movie (or every other movie).
+        """
+        return (self.precomputed is not None and self.precomputed.model_version == self.model_version
+                and self.precomputed.top_k >= min(top_n, len(self.df) - 1))
+    
+    def _format_recommendations(self, indices, scores) -> List[Dict]:
+        """
+        Turn ranked catalog rows and their scores into recommendation dicts.
+        """
+        # One take of all rows instead of a pandas row lookup per movie
+        movies = self.df.iloc[np.asarray(indices, dtype=np.intp)]
         recommendations = []
-        for i, movie_idx in enumerate(top_indices):
-            movie_data = self.df.iloc[movie_idx]
+        for i, (title, genre, year, rating, score) in enumerate(zip(
+                movies['title'].to_numpy(), movies['genre'].to_numpy(), movies['year'].to_numpy(),
+                movies['rating'].to_numpy(), scores)):
             recommendations.append({
                 'rank': i + 1,
-                'title': movie_data['title'],
-                'genre': movie_data['genre'],
-                'year': movie_data['year'],
-                'rating': movie_data['rating'],
-                'similarity_score': round(similarity_scores[i+1][1], 3)
+                'title': title,
+                'genre': genre,
+                'year': year,
+                'rating': rating,
+                'similarity_score': round(float(score), 3)
             })
         
         return recommendations
     
-    def get_movie_details(self, movie_title: str) -> Dict:
+    def get_movie_details(self, movie_title: str, year: int = None) -> Dict:
         """
         Get detailed information about a specific movie.
+        
+        If several movies share the title, `year` selects one; otherwise the
+        first listed is returned.
         """
-        if movie_title not in self.df['title'].values:
-            return {"error": f"Movie '{movie_title}' not found in dataset."}
+        idx = self._find_movie(movie_title, year)
+        if idx is None:
+            return {"error": self._not_found(movie_title, year)}
         
-        movie_data = self.df[self.df['title'] == movie_title].iloc[0]
+        movie_data = self.df.iloc[idx]
         return {
             'title': movie_data['title'],
             'genre': movie_data['genre'],
@@ -263,27 +1020,150 @@ class MovieRecommendationSystem:
         """
         Find movies similar to a specific genre.
         """
-        genre_movies = self.df[self.df['genre'].str.contains(genre, case=False)]
-        if len(genre_movies) == 0:
+        genre_rows = self._live_rows(self.genre_index.rows(genre))
+        if len(genre_rows) == 0:
             return [{"error": f"No movies found with genre '{genre}'."}]
         
         # Get the first movie of this genre and find similar movies
-        sample_movie = genre_movies.iloc[0]['title']
-        return self.recommend_movies(sample_movie, top_n)
+        sample_movie = self.df.iloc[genre_rows[0]]
+        return self.recommend_movies(sample_movie['title'], top_n, year=sample_movie['year'])
+    
+    def get_movies_by_genre(self, genres: List[str], match_all: bool = False) -> List[Dict]:
+        """
+        Get movies tagged with any of the given genres, or with all of them
+        if match_all is True. Genre names match exactly, ignoring case.
+        """
+        rows = self._live_rows(self.genre_index.rows(genres, match_all))
+        return self.df.iloc[rows][['title', 'genre', 'year', 'rating']].to_dict('records')
     
     def get_popular_movies(self, top_n: int = 10) -> List[Dict]:
         """
         Get the most popular movies based on rating.
         """
-        popular_movies = self.df.nlargest(top_n, 'rating')
+        popular_movies = self.df.drop(index=list(self.removed)).nlargest(top_n, 'rating')
         return popular_movies[['title', 'genre', 'year', 'rating']].to_dict('records')
     
     def get_movies_by_year_range(self, start_year: int, end_year: int) -> List[Dict]:
         """
         Get movies from a specific year range.
         """
-        year_movies = self.df[(self.df['year'] >= start_year) & (self.df['year'] <= end_year)]
-        return year_movies[['title', 'genre', 'year', 'rating']].to_dict('records')
+        return self.find_movies(year_range=(start_year, end_year))
+    
+    def find_movies(self, year_range: Tuple[int, int] = None, genres: List[str] = None,
+                    min_rating: float = None, match_all_genres: bool = False) -> List[Dict]:
+        """
+        Get movies matching every given filter, in catalog order.
+        
+        Args:
+            year_range (Tuple[int, int]): Inclusive (start_year, end_year); either end may be None
+            genres (List[str]): Genres to match (any of them, or all if match_all_genres)
+            min_rating (float): Minimum rating
+        """
+        rows = self._filter_rows(year_range, genres, min_rating, match_all_genres)
+        if rows is None:
+            rows = np.arange(len(self.df))
+        rows = self._live_rows(rows)
+        return self.df.iloc[rows][['title', 'genre', 'year', 'rating']].to_dict('records')
+    
+    def _filter_rows(self, year_range=None, genres=None, min_rating=None, match_all_genres=False):
+        """
+        Sorted catalog rows passing all filters, or None when no filter is set.
+        
+        Each filter is answered from its index (binary search on the year and
+        rating orderings, posting lists for genres) and the row sets are
+        intersected smallest first, so no intermediate DataFrames are built.
+        """
+        row_sets = []
+        if year_range is not None:
+            row_sets.append(np.sort(self.year_index.between(*year_range)))
+        if genres:
+            row_sets.append(self.genre_index.rows(genres, match_all_genres))
+        if min_rating is not None:
+            row_sets.append(np.sort(self.rating_index.between(min_rating, None)))
+        if not row_sets:
+            return None
+        return intersect_rows(row_sets)
+    
+    def save(self, path: str) -> str:
+        """
+        Save the fitted model (vocabulary, IDF weights, TF-IDF matrix, similarity
+        and catalog columns) to a versioned artifact directory.
+        """
+        save_artifact(self, path)
+        print(f"✅ Model saved to '{path}'")
+        return path
+    
+    @classmethod
+    def load(cls, path: str, catalog_version: str = None) -> 'MovieRecommendationSystem':
+        """
+        Load a model saved with save(). Numeric arrays are memory-mapped, so
+        cold start is close to zero.
+        
+        Args:
+            path (str): Artifact directory
+            catalog_version (str): If given, raise ValueError unless the artifact
+                was built from this catalog version (see compute_catalog_version)
+        """
+        return load_artifact(cls(), path, catalog_version)
+    
+    @classmethod
+    def load_or_build(cls, path: str, catalog: pd.DataFrame, embedding_dim: int = None,
+                      precompute_top_k: int = None, **similarity_kwargs) -> 'MovieRecommendationSystem':
+        """
+        Load the saved model for `catalog` from path, or build it from scratch and
+        save it there when the artifact is missing or stale.
+        
+        With precompute_top_k, the artifact also carries a precomputed
+        recommendation table of that depth; a loaded artifact without a current
+        one gets it built and saved. An artifact built with a different
+        embedding_dim or similarity settings is rebuilt.
+        """
+        build_params = cls._build_params(embedding_dim, similarity_kwargs)
+        for attempt in range(3):
+            if not os.path.exists(path):
+                break
+            try:
+                recommender = cls.load(path, catalog_version=compute_catalog_version(catalog))
+                if recommender.build_params != build_params:
+                    raise ValueError(f"Model artifact at '{path}' was built with {recommender.build_params}, "
+                                     f"not {build_params}.")
+                if precompute_top_k and not recommender._precomputed_is_current(precompute_top_k):
+                    recommender.precompute_recommendations(precompute_top_k)
+                    recommender.save(path)
+                return recommender
+            except ValueError as e:
+                print(f"⚠️ {e} Rebuilding the model...")
+                break
+            except OSError as e:
+                # A sibling process replaced the version we were reading; load the new one
+                print(f"⚠️ {e} Retrying the load...")
+        
+        recommender = cls()
+        recommender.load_dataset(catalog)
+        recommender.vectorize_descriptions(embedding_dim)
+        recommender.compute_similarity(**similarity_kwargs)
+        if precompute_top_k:
+            recommender.precompute_recommendations(precompute_top_k)
+        recommender.build_params = build_params
+        recommender.save(path)
+        return recommender
+    
+    @classmethod
+    def _build_params(cls, embedding_dim, similarity_kwargs) -> Dict:
+        """
+        JSON-friendly record of the settings that change the built model, with
+        compute_similarity's defaults filled in so equivalent calls compare equal.
+        """
+        defaults = {name: parameter.default
+                    for name, parameter in inspect.signature(cls.compute_similarity).parameters.items()
+                    if parameter.default is not inspect.Parameter.empty}
+        settings = {**defaults, **similarity_kwargs}
+        # Only the neighbour table depends on top_k and dtype; where and in what
+        # block sizes the similarity is built never changes it
+        similarity = {'mode': settings['mode']}
+        if settings['mode'] == 'neighbors':
+            similarity.update(top_k=settings['top_k'], dtype=np.dtype(settings['dtype']).name)
+        return {'embedding_dim': embedding_dim, 'similarity': similarity}
     
     def analyze_dataset(self):
         """
@@ -297,13 +1177,9 @@ class MovieRecommendationSystem:
         print(f"Rating range: {self.df['rating'].min():.1f} - {self.df['rating'].max():.1f}")
         
         # Genre analysis
-        all_genres = []
-        for genres in self.df['genre']:
-            all_genres.extend([g.strip() for g in genres.split(',')])
-        
-        genre_counts = pd.Series(all_genres).value_counts()
+        genre_counts = self.genre_index.counts()
         print(f"\nTop 10 Genres:")
-        for genre, count in genre_counts.head(10).items():
+        for genre, count in list(genre_counts.items())[:10]:
             print(f"  {genre}: {count} movies")
         
         # Year distribution
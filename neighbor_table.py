@@ -0,0 +1,178 @@
+import numpy as np
+from ranking import top_k_rows
+
+
+class NeighborTable:
+    """
+    Top-K most similar movies for every movie, stored in CSR form.
+
+    Row i's neighbours live in indices[indptr[i]:indptr[i+1]] with matching
+    scores, already ordered from most to least similar. Memory is O(N*K)
+    instead of the O(N^2) of a dense cosine similarity matrix.
+
+    `top_k` is the configured K. Lists are shorter while the catalog has
+    fewer than K + 1 movies, and incremental updates never grow them past K.
+    """
+
+    def __init__(self, indptr, indices, scores, top_k: int = None):
+        self.indptr = indptr
+        self.indices = indices
+        self.scores = scores
+        self.top_k = top_k
+
+    @property
+    def n_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self) -> int:
+        return self.indptr.nbytes + self.indices.nbytes + self.scores.nbytes
+
+    def row(self, i: int):
+        """
+        Return (neighbour indices, scores) for movie i, best first.
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.scores[start:end]
+
+
+def neighbor_block(tfidf_matrix, start: int, end: int, top_k: int):
+    """
+    Compute the top_k neighbours of rows start:end against the whole catalog.
+
+    TF-IDF rows are L2-normalised, so the sparse dot product is the cosine
+    similarity. Only a (block x N) slab is ever held in memory.
+    """
+    n = tfidf_matrix.shape[0]
+    block = (tfidf_matrix[start:end] @ tfidf_matrix.T).toarray()
+    # A movie is never its own neighbour
+    block[np.arange(end - start), np.arange(start, end)] = -np.inf
+
+    top_k = min(top_k, n - 1)
+    indices = top_k_rows(block, top_k)
+    scores = np.take_along_axis(block, indices, axis=1)
+    return indices, scores
+
+
+def build_neighbor_table(tfidf_matrix, top_k: int = 50, block_size: int = 256,
+                         dtype=np.float32) -> NeighborTable:
+    """
+    Build a NeighborTable by computing similarities one row block at a time.
+
+    Args:
+        tfidf_matrix: L2-normalised sparse TF-IDF matrix (N x features)
+        top_k (int): Neighbours kept per movie
+        block_size (int): Rows processed per block; peak memory is block_size x N
+        dtype: Score dtype, np.float32 or np.float16
+
+    Returns:
+        NeighborTable: CSR table with min(top_k, N-1) neighbours per movie
+    """
+    n = tfidf_matrix.shape[0]
+    k = max(min(top_k, n - 1), 0)
+    indices = np.empty((n, k), dtype=np.int32)
+    scores = np.empty((n, k), dtype=dtype)
+
+    for start in range(0, n, block_size):
+        end = min(start + block_size, n)
+        block_indices, block_scores = neighbor_block(tfidf_matrix, start, end, k)
+        indices[start:end] = block_indices
+        scores[start:end] = block_scores
+
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int64) if k else np.zeros(n + 1, dtype=np.int64)
+    return NeighborTable(indptr, indices.ravel(), scores.ravel(), top_k)
+
+
+def extend_neighbor_table(table: NeighborTable, tfidf_matrix, n_old: int,
+                          block_size: int = 256) -> NeighborTable:
+    """
+    Update a NeighborTable after rows n_old: were appended to tfidf_matrix.
+
+    The new movies get their own lists, and an existing list is only merged
+    again when a new movie beats its current worst neighbour (or the list is
+    not full yet). Only the old x new similarities are computed, never old x old.
+
+    Args:
+        table (NeighborTable): Table built over the first n_old rows
+        tfidf_matrix: L2-normalised TF-IDF matrix including the new rows
+        n_old (int): Number of rows the table was built for
+        block_size (int): Rows processed per block
+    """
+    n = tfidf_matrix.shape[0]
+    lengths = np.diff(table.indptr)
+    configured = table.top_k
+    if configured is None:
+        # Tables saved without their K: infer it from the list lengths
+        configured = int(lengths.max()) if n_old else 0
+        if configured >= n_old - 1:
+            # Lists held every other movie, so they were never truncated
+            configured = n - 1
+    top_k = max(min(configured, n - 1), 0)
+    new_rows = np.arange(n_old, n)
+
+    cross = (tfidf_matrix[:n_old] @ tfidf_matrix[n_old:].T).tocsr()
+    # Compare at the stored precision, so ties with existing entries resolve by row
+    cross.data = cross.data.astype(table.scores.dtype).astype(np.float32)
+    table_indices = np.asarray(table.indices)
+    table_scores = np.asarray(table.scores, dtype=np.float32)
+    # Score of each list's current worst neighbour; lists that are not full take anything
+    full = (lengths >= top_k) & (lengths > 0)
+    worst = np.full(n_old, -np.inf)
+    worst[full] = table_scores[table.indptr[1:][full] - 1]
+    best_new = cross.max(axis=1).toarray().ravel()
+    affected = np.flatnonzero((lengths < top_k) | (best_new > worst))
+
+    # Unaffected lists are copied over as they are
+    entry_rows = np.repeat(np.arange(n_old), lengths)
+    keep = np.ones(n_old, dtype=bool)
+    keep[affected] = False
+    keep = keep[entry_rows]
+    rows, indices, scores = [entry_rows[keep]], [table_indices[keep]], [table_scores[keep]]
+
+    width = int(lengths.max()) if n_old else 0
+    for start in range(0, len(affected), block_size):
+        block = affected[start:start + block_size]
+        # Pad the old lists to a rectangle; padding scores -inf and sorts last
+        padded = np.arange(width) >= lengths[block][:, None]
+        positions = np.where(padded, 0, table.indptr[block][:, None] + np.arange(width))
+        old_indices = table_indices[positions] if width else positions
+        old_scores = np.where(padded, -np.inf, table_scores[positions] if width else 0.0)
+
+        block_scores = np.hstack([old_scores, cross[block].toarray()])
+        block_indices = np.hstack([old_indices, np.broadcast_to(new_rows, (len(block), len(new_rows)))])
+        picked = top_k_rows(block_scores, top_k)
+        picked_scores = np.take_along_axis(block_scores, picked, axis=1)
+        valid = picked_scores > -np.inf
+        rows.append(np.repeat(block, valid.sum(axis=1)))
+        indices.append(np.take_along_axis(block_indices, picked, axis=1)[valid])
+        scores.append(picked_scores[valid])
+
+    for start in range(n_old, n, block_size):
+        end = min(start + block_size, n)
+        block_indices, block_scores = neighbor_block(tfidf_matrix, start, end, top_k)
+        rows.append(np.repeat(np.arange(start, end), block_indices.shape[1]))
+        indices.append(block_indices.ravel())
+        scores.append(block_scores.ravel())
+
+    return _assemble(np.concatenate(rows), np.concatenate(indices), np.concatenate(scores),
+                     n, table.scores.dtype, table.top_k)
+
+
+def compact_neighbor_table(table: NeighborTable, live: np.ndarray) -> NeighborTable:
+    """
+    Drop the rows where `live` is False and renumber the rest, removing the
+    dropped movies from every remaining list.
+    """
+    new_ids = np.cumsum(live) - 1
+    entry_rows = np.repeat(np.arange(table.n_rows), np.diff(table.indptr))
+    indices = np.asarray(table.indices)
+    keep = live[entry_rows] & live[indices]
+    return _assemble(new_ids[entry_rows[keep]], new_ids[indices[keep]],
+                     np.asarray(table.scores)[keep], int(live.sum()), table.scores.dtype, table.top_k)
+
+
+def _assemble(rows, indices, scores, n_rows: int, dtype, top_k: int = None) -> NeighborTable:
+    # Stable sort keeps each row's entries in their best-first order
+    order = np.argsort(rows, kind='stable')
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_rows))]).astype(np.int64)
+    return NeighborTable(indptr, indices[order].astype(np.int32), scores[order].astype(dtype), top_k)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import numpy as np
+from neighbor_table import NeighborTable, neighbor_block
+
+STATE_FILE = 'build_state.json'
+
+
+def matrix_fingerprint(tfidf_matrix) -> str:
+    """
+    Hash the CSR arrays of a TF-IDF matrix so a resumed build can tell whether
+    it is still working on the same input.
+    """
+    matrix = tfidf_matrix.tocsr()
+    digest = hashlib.sha1()
+    digest.update(np.asarray(matrix.shape, dtype=np.int64).tobytes())
+    for array in (matrix.indptr, matrix.indices, matrix.data):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def _print_progress(done_rows: int, total_rows: int):
+    print(f"   ⏳ {done_rows}/{total_rows} movies processed ({100 * done_rows / max(total_rows, 1):.0f}%)")
+
+
+def _read_state(state_path: str):
+    if not os.path.exists(state_path):
+        return None
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def _write_state(state_path: str, state: dict):
+    # Write-then-rename so a crash never leaves a half-written state file
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_path)
+
+
+def _run_blocks(tfidf_matrix, out_dir, params, arrays, compute_block, block_size, progress):
+    """
+    Stream row blocks into .npy memmaps under out_dir, resuming after a crash.
+
+    `arrays` maps file name -> (dtype, shape); `compute_block(start, end)`
+    returns one array per file for rows start:end. Completed rows are recorded
+    in build_state.json after every block, and only once the memmaps have been
+    flushed, so a restart picks up at the first unfinished block.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_FILE)
+    progress = progress or _print_progress
+    n = tfidf_matrix.shape[0]
+
+    params = dict(params, n_rows=n, block_size=block_size,
+                  fingerprint=matrix_fingerprint(tfidf_matrix))
+    state = _read_state(state_path)
+    paths = {name: os.path.join(out_dir, name) for name in arrays}
+    resumable = (state is not None and state['params'] == params
+                 and all(os.path.exists(path) for path in paths.values()))
+
+    if resumable:
+        done = state['completed_rows']
+        maps = {name: np.lib.format.open_memmap(paths[name], mode='r+') for name in arrays}
+        if done < n:
+            print(f"🔁 Resuming similarity build at movie {done}/{n}")
+    else:
+        done = 0
+        maps = {name: np.lib.format.open_memmap(paths[name], mode='w+', dtype=dtype, shape=shape)
+                for name, (dtype, shape) in arrays.items()}
+        _write_state(state_path, {'params': params, 'completed_rows': 0})
+
+    for start in range(done, n, block_size):
+        end = min(start + block_size, n)
+        for name, block in zip(arrays, compute_block(start, end)):
+            maps[name][start:end] = block
+        for mm in maps.values():
+            mm.flush()
+        _write_state(state_path, {'params': params, 'completed_rows': end})
+        progress(end, n)
+
+    del maps
+    return {name: np.load(paths[name], mmap_mode='r') for name in arrays}
+
+
+def build_similarity_memmap(tfidf_matrix, out_dir: str, block_size: int = 256,
+                            dtype=np.float32, progress=None):
+    """
+    Write the dense N x N cosine similarity matrix to out_dir/cosine_sim.npy.
+
+    Only one (block_size x N) slab is held in RAM at a time. Returns the
+    finished matrix as a read-only memmap.
+    """
+    n = tfidf_matrix.shape[0]
+
+    def compute_block(start, end):
+        return [(tfidf_matrix[start:end] @ tfidf_matrix.T).toarray()]
+
+    arrays = {'cosine_sim.npy': (dtype, (n, n))}
+    params = {'mode': 'dense', 'dtype': np.dtype(dtype).name}
+    return _run_blocks(tfidf_matrix, out_dir, params, arrays, compute_block,
+                       block_size, progress)['cosine_sim.npy']
+
+
+def build_neighbor_table_memmap(tfidf_matrix, out_dir: str, top_k: int = 50,
+                                block_size: int = 256, dtype=np.float32,
+                                progress=None) -> NeighborTable:
+    """
+    Build a NeighborTable whose arrays live in .npy memmaps under out_dir.
+
+    Same result as build_neighbor_table, but neighbour blocks are streamed to
+    disk as they are computed and the build resumes after a crash.
+    """
+    n = tfidf_matrix.shape[0]
+    k = max(min(top_k, n - 1), 0)
+
+    def compute_block(start, end):
+        return neighbor_block(tfidf_matrix, start, end, k)
+
+    arrays = {
+        'neighbor_indices.npy': (np.int32, (n, k)),
+        'neighbor_scores.npy': (dtype, (n, k)),
+    }
+    params = {'mode': 'neighbors', 'top_k': k, 'dtype': np.dtype(dtype).name}
+    maps = _run_blocks(tfidf_matrix, out_dir, params, arrays, compute_block,
+                       block_size, progress)
+
+    indptr = np.arange(0, n * k + 1, k, dtype=np.int64) if k else np.zeros(n + 1, dtype=np.int64)
+    return NeighborTable(indptr, maps['neighbor_indices.npy'].reshape(-1),
+                         maps['neighbor_scores.npy'].reshape(-1), top_k)
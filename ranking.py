@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def top_k_indices(scores, k, exclude=None):
+    """
+    Return the indices of the k highest scores, best first.
+
+    Uses partial selection (np.argpartition) so only the k winners are sorted,
+    not the whole row. Ties are broken by the lower index, so the result is
+    deterministic. Indices listed in `exclude` and scores of -inf are never
+    returned, which means fewer than k indices come back when the row runs out.
+
+    Args:
+        scores: 1-D array-like of similarity scores
+        k (int): Number of indices to return
+        exclude: Optional iterable of indices to leave out (e.g. the query movie)
+
+    Returns:
+        np.ndarray: Indices into `scores`, ordered from best to worst
+    """
+    scores = np.asarray(scores).ravel()
+    if exclude is not None:
+        scores = scores.astype(np.float64, copy=True)
+        scores[np.asarray(list(exclude), dtype=np.intp)] = -np.inf
+
+    n = scores.shape[0]
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        threshold = scores[candidates].min()
+        # Everything strictly above the k-th score is in; the remaining slots
+        # go to the lowest indices tied at the boundary.
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+
+    candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+    return candidates[scores[candidates] > -np.inf]
+
+
+def top_k_rows(scores, k):
+    """
+    Row-wise version of `top_k_indices` for a 2-D block of scores.
+
+    Every row is handled in one vectorized pass: np.argpartition picks the k
+    winners per row and boundary ties are resolved towards the lower index,
+    exactly as `top_k_indices` does for a single row. Excluded entries should be
+    set to -inf by the caller; they sort last and can be dropped afterwards.
+
+    Args:
+        scores (np.ndarray): Array of shape (n_queries, n_items)
+        k (int): Number of indices to keep per row
+
+    Returns:
+        np.ndarray: Array of shape (n_queries, min(k, n_items)), best first
+    """
+    scores = np.asarray(scores)
+    n_rows, n = scores.shape
+    k = min(max(int(k), 0), n)
+    if k == 0 or n_rows == 0:
+        return np.empty((n_rows, k), dtype=np.intp)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        picked = np.take_along_axis(scores, candidates, axis=1)
+        threshold = picked.min(axis=1)
+        tied = scores == threshold[:, None]
+        picked_ties = (picked == threshold[:, None]).sum(axis=1)
+        unstable = np.flatnonzero(tied.sum(axis=1) > picked_ties)
+        if len(unstable):
+            # argpartition picked arbitrary members of a tie; re-pick the lowest indices
+            above = scores[unstable] > threshold[unstable, None]
+            need = k - above.sum(axis=1)
+            tied_sub = tied[unstable]
+            chosen = above | (tied_sub & (np.cumsum(tied_sub, axis=1) <= need[:, None]))
+            candidates[unstable] = np.nonzero(chosen)[1].reshape(len(unstable), k)
+    else:
+        candidates = np.broadcast_to(np.arange(n), (n_rows, n)).copy()
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.lexsort((candidates, -candidate_scores), axis=1)
+    return np.take_along_axis(candidates, order, axis=1)
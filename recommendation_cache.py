@@ -0,0 +1,294 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter, OrderedDict
+
+
+class CacheBackend(ABC):
+    """
+    Interface shared by the recommendation caches.
+
+    A backend implements get(), put(), clear() and stats(); get_or_compute()
+    is built on top of them. Keys are tuples of JSON-friendly values, and
+    backends shared between processes may require values to be JSON-friendly too.
+    """
+
+    @abstractmethod
+    def get(self, key, default=None):
+        """
+        Cached value for `key`, or `default` if absent or expired.
+        """
+
+    @abstractmethod
+    def put(self, key, value):
+        """
+        Store `value` under `key`.
+        """
+
+    @abstractmethod
+    def clear(self):
+        """
+        Drop every entry.
+        """
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Counters describing how well the cache is doing.
+        """
+
+    def get_or_compute(self, key, compute):
+        """
+        Cached value for `key`, computing and storing it with compute() on a miss.
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+class RecommendationCache(CacheBackend):
+    """
+    Thread-safe in-process LRU cache for recommendation responses.
+
+    Holds at most `max_size` entries; storing one more evicts the least
+    recently used. With `ttl_seconds`, entries also expire that long after
+    they were stored. Keys should include the model version so answers from
+    an older model are never served after a rebuild; they simply age out.
+    """
+
+    def __init__(self, max_size: int = 4096, ttl_seconds: float = None, clock=time.monotonic):
+        """
+        Args:
+            max_size (int): Maximum number of cached responses
+            ttl_seconds (float): Optional lifetime of an entry, in seconds
+            clock: Time source returning seconds (injectable for tests)
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key, default=None):
+        """
+        Cached value for `key`, or `default` if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or self._clock() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+            return default
+
+    def put(self, key, value):
+        """
+        Store `value` under `key`, evicting the least recently used entry if full.
+        """
+        expires_at = None if self.ttl_seconds is None else self._clock() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """
+        Drop every entry (counters are kept).
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters for sizing the cache.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'backend': 'memory',
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions,
+                'expirations': self._expirations,
+            }
+
+
+class SQLiteRecommendationCache(CacheBackend):
+    """
+    LRU cache with optional TTL kept in a SQLite file, shared by every process
+    on the host (e.g. all gunicorn workers).
+
+    One worker's answer is a hit for all the others, so the hit rate no longer
+    drops as workers are added. The database runs in WAL mode so readers do
+    not block each other; each process and thread opens its own connection.
+    Values are stored as JSON.
+
+    A hit is a plain read. An entry's LRU timestamp is refreshed at most once
+    per `touch_interval` seconds, so hot keys do not queue every worker on the
+    database write lock. Hit and miss counts are kept in memory and added to
+    the shared counters on the next write (or every `flush_every` lookups), so
+    stats() reports the whole host, slightly behind.
+    """
+
+    def __init__(self, path: str = 'recommendation_cache.sqlite', max_size: int = 4096,
+                 ttl_seconds: float = None, clock=time.time, touch_interval: float = 1.0,
+                 flush_every: int = 256):
+        """
+        Args:
+            path (str): SQLite database file, created if missing
+            max_size (int): Maximum number of cached responses
+            ttl_seconds (float): Optional lifetime of an entry, in seconds
+            clock: Wall-clock time source (shared between processes)
+            touch_interval (float): Minimum seconds between LRU updates of one entry
+            flush_every (int): Lookups counted in memory before writing the counters
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.touch_interval = touch_interval
+        self.flush_every = flush_every
+        self._clock = clock
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._pending = Counter()
+        self._pending_lock = threading.Lock()
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                       "expires_at REAL, last_used REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            db.executemany("INSERT OR IGNORE INTO counters VALUES (?, 0)",
+                           [(name,) for name in ('hits', 'misses', 'evictions', 'expirations')])
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not cross threads or forked processes
+        if self._pid != os.getpid():
+            # A forked worker starts with its own, empty unflushed counters
+            self._pid, self._pending, self._pending_lock = os.getpid(), Counter(), threading.Lock()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def _count(self, name: str):
+        with self._pending_lock:
+            self._pending[name] += 1
+            due = self._pending['hits'] + self._pending['misses'] >= self.flush_every
+        if due:
+            with self._connection() as db:
+                self._flush_counters(db)
+
+    def _flush_counters(self, db):
+        # Called inside a write transaction
+        with self._pending_lock:
+            pending, self._pending = self._pending, Counter()
+        db.executemany("UPDATE counters SET value = value + ? WHERE name = ?",
+                       [(amount, name) for name, amount in pending.items() if amount])
+
+    def get(self, key, default=None):
+        """
+        Cached value for `key`, or `default` if absent or expired.
+        """
+        key, now = json.dumps(key), self._clock()
+        db = self._connection()
+        row = db.execute("SELECT value, expires_at, last_used FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None and (row[1] is None or now < row[1]):
+            if now - row[2] >= self.touch_interval:
+                with db:
+                    db.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self._count('hits')
+            return json.loads(row[0])
+        if row is not None:
+            with db:
+                db.execute("DELETE FROM entries WHERE key = ? AND expires_at <= ?", (key, now))
+            self._count('expirations')
+        self._count('misses')
+        return default
+
+    def put(self, key, value):
+        """
+        Store `value` under `key`, evicting the least recently used entries if full.
+        """
+        now = self._clock()
+        expires_at = None if self.ttl_seconds is None else now + self.ttl_seconds
+        with self._connection() as db:
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                       (json.dumps(key), json.dumps(value), expires_at, now))
+            evicted = db.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                                 "ORDER BY last_used LIMIT max(0, (SELECT COUNT(*) FROM entries) - ?))",
+                                 (self.max_size,)).rowcount
+            if evicted:
+                with self._pending_lock:
+                    self._pending['evictions'] += evicted
+            self._flush_counters(db)
+
+    def clear(self):
+        """
+        Drop every entry (counters are kept).
+        """
+        with self._connection() as db:
+            db.execute("DELETE FROM entries")
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> dict:
+        """
+        Hit/miss/eviction counters across every process using the database.
+        """
+        db = self._connection()
+        with db:
+            self._flush_counters(db)
+        counters = dict(db.execute("SELECT name, value FROM counters").fetchall())
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'backend': 'sqlite',
+            'size': len(self),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'evictions': counters['evictions'],
+            'expirations': counters['expirations'],
+        }
+
+
+CACHE_BACKENDS = {'memory': RecommendationCache, 'sqlite': SQLiteRecommendationCache}
+
+
+def create_cache(backend: str = 'sqlite', **options) -> CacheBackend:
+    """
+    Build a cache by backend name ('memory' or 'sqlite'), passing `options`
+    (max_size, ttl_seconds, and path for sqlite) to its constructor.
+    """
+    if backend not in CACHE_BACKENDS:
+        raise ValueError(f"Unknown cache backend '{backend}'. Use {' or '.join(map(repr, CACHE_BACKENDS))}.")
+    return CACHE_BACKENDS[backend](**options)
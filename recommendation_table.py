@@ -0,0 +1,32 @@
+class RecommendationTable:
+    """
+    Precomputed top-K recommendations for every movie in the catalog.
+
+    ids[i] holds movie i's recommended rows, best first, padded with -1 when
+    fewer than K other movies exist; scores[i] holds their similarities as
+    float16 (plenty for scores shown to 3 decimals). Serving a title is then an
+    array slice. The table records the catalog and model version it was built
+    from so a stale table is never served.
+    """
+
+    def __init__(self, ids, scores, catalog_version: str, model_version: int):
+        self.ids = ids
+        self.scores = scores
+        self.catalog_version = catalog_version
+        self.model_version = model_version
+
+    @property
+    def top_k(self) -> int:
+        return self.ids.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.scores.nbytes
+
+    def row(self, i: int, top_n: int = None):
+        """
+        Return (ids, scores) of movie i's first top_n recommendations.
+        """
+        ids = self.ids[i, :top_n]
+        valid = ids >= 0
+        return ids[valid], self.scores[i, :top_n][valid]
@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+
+class RequestCoalescer:
+    """
+    Micro-batches concurrent requests into single batch evaluations.
+
+    Callers block in submit() while a background thread collects every request
+    that arrives within `window_ms` of the first one (or until
+    `max_batch_size` are waiting), hands them to `batch_fn` in one call, and
+    returns each caller its own result. This trades up to `window_ms` of
+    latency for one vectorized matrix operation instead of many small ones.
+    If a batch fails, its requests are retried one at a time so an error only
+    reaches the caller whose request caused it.
+    """
+
+    def __init__(self, batch_fn, window_ms: float = 2.0, max_batch_size: int = 32):
+        """
+        Args:
+            batch_fn: Callable taking a list of request items and returning a list
+                of results in the same order
+            window_ms (float): How long to wait for more requests after the first
+            max_batch_size (int): Flush immediately once this many are waiting
+        """
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max_batch_size
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._batch_sizes = Counter()
+
+    def submit(self, item, timeout: float = None):
+        """
+        Queue one request and wait for its result.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def stats(self) -> dict:
+        """
+        Counters describing the batch sizes achieved so far.
+        """
+        with self._lock:
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches = sum(sizes.values())
+        requests = sum(size * count for size, count in sizes.items())
+        return {
+            'window_ms': self.window * 1000.0,
+            'max_batch_size': self.max_batch_size,
+            'requests': requests,
+            'batches': batches,
+            'mean_batch_size': round(requests / batches, 2) if batches else 0.0,
+            'largest_batch': max(sizes, default=0),
+            'batch_size_histogram': sizes,
+        }
+
+    def _ensure_worker(self):
+        # Started lazily so each forked gunicorn worker gets its own thread
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='request-coalescer', daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            with self._lock:
+                self._batch_sizes[len(batch)] += 1
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception:
+                # Retry one by one so a bad request only fails its own caller
+                self._run_each(batch)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def _run_each(self, batch):
+        for item, future in batch:
+            try:
+                future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                future.set_exception(e)
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from ranking import top_k_indices
 
 def create_simple_dataset():
     """Create a simple dataset with a few movies."""
@@ -60,11 +61,10 @@ def recommend_movies(df, movie_title, top_n=3):
     movie_idx = df[df['title'] == movie_title].index[0]
     
     # Get similarity scores
-    similarity_scores = list(enumerate(cosine_sim[movie_idx]))
-    similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+    similarity_scores = cosine_sim[movie_idx]
     
     # Get top N similar movies (excluding the movie itself)
-    top_indices = [i[0] for i in similarity_scores[1:top_n+1]]
+    top_indices = top_k_indices(similarity_scores, top_n, exclude=[movie_idx])
     
     recommendations = []
     for i, idx in enumerate(top_indices):
@@ -75,7 +75,7 @@ def recommend_movies(df, movie_title, top_n=3):
             'genre': movie_data['genre'],
             'year': movie_data['year'],
             'rating': movie_data['rating'],
-            'similarity_score': round(similarity_scores[i+1][1], 3)
+            'similarity_score': round(float(similarity_scores[idx]), 3)
         })
     
     return recommendations
@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from ranking import top_k_indices
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -212,11 +213,10 @@ class SimpleMovieRecommender:
             return [{"error": f"Movie '{movie_title}' not found in dataset."}]
         
         idx = self.movie_indices[movie_title]
-        similarity_scores = list(enumerate(self.cosine_sim[idx]))
-        similarity_scores = sorted(similarity_scores, key=lambda x: x[1], reverse=True)
+        similarity_scores = self.cosine_sim[idx]
         
         # Get top N similar movies (excluding the movie itself)
-        top_indices = [i[0] for i in similarity_scores[1:top_n+1]]
+        top_indices = top_k_indices(similarity_scores, top_n, exclude=[idx])
         
         recommendations = []
         for i, movie_idx in enumerate(top_indices):
@@ -227,7 +227,7 @@ class SimpleMovieRecommender:
                 'genre': movie_data['genre'],
                 'year': movie_data['year'],
                 'rating': movie_data['rating'],
-                'similarity_score': round(similarity_scores[i+1][1], 3)
+                'similarity_score': round(float(similarity_scores[movie_idx]), 3)
             })
         
         return recommendations
@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+from catalog_index import SortedIndex
+
+
+def test_sorted_index_matches_pandas_mask_on_float32_ratings():
+    # Ratings as the catalog loader stores them: one decimal, float32
+    ratings = pd.Series(np.round(np.random.default_rng(0).uniform(1, 10, 2000), 1)).astype(np.float32)
+    index = SortedIndex(ratings.to_numpy())
+
+    for low, high in [(8.7, None), (None, 8.7), (7.3, 8.7), (9.9, 9.9), (5, 6)]:
+        mask = pd.Series(True, index=ratings.index)
+        if low is not None:
+            mask &= ratings >= low
+        if high is not None:
+            mask &= ratings <= high
+        assert sorted(index.between(low, high).tolist()) == np.flatnonzero(mask).tolist()
+
+
+def test_sorted_index_integer_years():
+    years = np.array([1994, 2010, 1999, 2010, 2020, 1994], dtype=np.int16)
+    index = SortedIndex(years)
+
+    assert sorted(index.between(1999, 2010).tolist()) == [1, 2, 3]
+    assert sorted(index.between(1999.5, None).tolist()) == [1, 3, 4]
+    assert index.between(2021, None).tolist() == []
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from movie_recommendation_system import MovieRecommendationSystem
+
+
+MOVIES = pd.DataFrame({
+    'title': ['Space Heist', 'Moon Robbery', 'Star Thieves', 'Quiet Garden', 'Rainy Cafe',
+              'Old Library', 'Desert Road', 'Ocean Lights'],
+    'description': ['space heist crew steals a starship', 'heist on the moon base crew',
+                    'thieves steal a star map in space', 'quiet garden romance in spring',
+                    'rainy cafe romance between strangers', 'old library mystery with a ghost',
+                    'desert road trip with two brothers', 'ocean lights documentary about reefs'],
+    'genre': ['Sci-Fi, Thriller', 'Sci-Fi', 'Sci-Fi, Action', 'Romance', 'Romance, Drama',
+              'Mystery', 'Drama', 'Documentary'],
+    'year': [2001, 2005, 2010, 1999, 2015, 1987, 2020, 2012],
+    'rating': [7.1, 6.4, 7.8, 6.9, 7.5, 8.0, 6.2, 7.0],
+})
+
+
+def build(mode):
+    recommender = MovieRecommendationSystem()
+    recommender.load_dataset(MOVIES.copy())
+    recommender.vectorize_descriptions()
+    recommender.compute_similarity(mode=mode)
+    return recommender
+
+
+def titles(recommendations):
+    return [rec['title'] for rec in recommendations]
+
+
+def test_index_mode_fills_top_n_like_dense_mode():
+    dense, index = build('dense'), build('index')
+
+    # Only two other movies share a term with 'Space Heist'; the rest score 0
+    for top_n in [2, 5, 7, 20]:
+        expected = titles(dense.recommend_movies('Space Heist', top_n))
+        assert titles(index.recommend_movies('Space Heist', top_n)) == expected
+        assert len(expected) == min(top_n, len(MOVIES) - 1)
+
+
+def test_index_mode_padding_respects_filters():
+    dense, index = build('dense'), build('index')
+    filters = {'year_range': (1990, 2016), 'exclude': ['Rainy Cafe']}
+
+    expected = titles(dense.recommend_movies('Space Heist', 5, **filters))
+    assert titles(index.recommend_movies('Space Heist', 5, **filters)) == expected
+    assert 'Rainy Cafe' not in expected and 'Old Library' not in expected
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from benchmark_retrieval import synthetic_tfidf
+from movie_recommendation_system import MovieRecommendationSystem
+from neighbor_table import build_neighbor_table, extend_neighbor_table
+
+
+def assert_same_table(table, expected):
+    assert np.array_equal(table.indptr, expected.indptr)
+    assert np.array_equal(table.indices, expected.indices)
+    assert np.allclose(table.scores, expected.scores)
+
+
+def test_extend_matches_fresh_build_and_keeps_top_k():
+    tfidf = synthetic_tfidf(210, n_terms=300, seed=1)
+
+    # 60 movies with K = 100: every list starts out holding all other movies
+    table = build_neighbor_table(tfidf[:60], top_k=100)
+    for n_old, n in [(60, 110), (110, 160), (160, 210)]:
+        table = extend_neighbor_table(table, tfidf[:n], n_old)
+        assert_same_table(table, build_neighbor_table(tfidf[:n], top_k=100))
+
+    assert table.top_k == 100
+    assert np.diff(table.indptr).max() == 100
+
+
+def test_add_movies_keeps_neighbor_lists_bounded():
+    rng = np.random.default_rng(0)
+    # A varied vocabulary, so no two neighbours tie on score
+    words = [f'word{i}' for i in range(200)]
+
+    def movies(start, count):
+        return pd.DataFrame({
+            'title': [f'Movie {i}' for i in range(start, start + count)],
+            'description': [' '.join(rng.choice(words, 6)) for _ in range(count)],
+            'genre': 'Drama',
+            'year': 2000,
+            'rating': 7.0,
+        })
+
+    recommender = MovieRecommendationSystem()
+    recommender.load_dataset(movies(0, 12))
+    recommender.vectorize_descriptions()
+    recommender.compute_similarity('neighbors', top_k=5)
+    for start in (12, 22, 32):
+        recommender.add_movies(movies(start, 10).to_dict('records'))
+
+    assert np.diff(recommender.neighbors.indptr).max() == 5
+    assert_same_table(recommender.neighbors, build_neighbor_table(recommender.tfidf_matrix, top_k=5))